@@ -5,20 +5,45 @@ This module provides the core functionality for scraping and optimizing
 Spanish train ticket purchases.
 """
 
+from importlib import import_module
+
 __version__ = "0.1.0"
 __author__ = "Angel"
 __email__ = "your-email@example.com"
 
-from .scraper import RenfeScraper
-from .optimizer import PriceOptimizer
-from .database import PriceDatabase
-from .models import TrainRoute, PriceData, OptimizationResult
+# Public names are imported on first access (PEP 562) so that importing the
+# package, e.g. for the CLI, does not load Playwright, pydantic or NumPy.
+_LAZY_IMPORTS = {
+    "RenfeScraper": ".scraper",
+    "RenfeApiClient": ".api",
+    "PriceOptimizer": ".optimizer",
+    "PriceDatabase": ".database",
+    "TrainRoute": ".models",
+    "PriceData": ".models",
+    "OptimizationResult": ".models",
+}
 
-__all__ = [
+__all__ = (
     "RenfeScraper",
+    "RenfeApiClient",
     "PriceOptimizer",
     "PriceDatabase",
     "TrainRoute",
     "PriceData",
     "OptimizationResult",
-]
\ No newline at end of file
+)
+
+
+def __getattr__(name):
+    """Import public names lazily and cache them in the module namespace."""
+    if name not in _LAZY_IMPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(import_module(_LAZY_IMPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    """Include lazily imported names in dir()."""
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,190 @@
+"""
+Compiled numeric kernels for batch analysis.
+
+batch_recommend applies the scoring rules of
+PriceOptimizer._generate_recommendation to whole arrays of routes at once,
+and price_stats summarizes a price array in one pass. The kernels are
+compiled with numba when it is installed
+(``pip install trenes-optimization-tool[fast]``) and run as plain Python
+otherwise.
+"""
+
+import numpy as np
+
+from .optimizer import (
+    _DAYS_BINS,
+    _DAYS_FACTORS,
+    _EXCELLENT_PRICE_FACTOR,
+    _EXCELLENT_PRICE_RATIO,
+    _GOOD_PRICE_RATIO,
+    _HIGH_PRICE_RATIO,
+    _OUTLIER_STDEVS,
+    _PRICE_ALERT_RATIO,
+    _PRICE_FACTORS,
+    _HIGH_PRICE_INDEX,
+    _TREND_FACTORS,
+    _VOLATILE_FACTOR,
+    _VOLATILITY_RATIO,
+)
+
+try:
+    from numba import njit, prange
+except ImportError:  # numba is optional
+    prange = range
+
+    def njit(*args, **kwargs):
+        """Stand-in for numba.njit that returns the function unchanged."""
+        def decorate(func):
+            return func
+        return decorate
+
+
+# Recommendation codes returned by batch_recommend
+BUY_NOW = 0
+WAIT = 1
+PRICE_ALERT = 2
+NO_DATA = 3
+
+# Trend codes accepted by batch_recommend
+TREND_STABLE = 0
+TREND_RISING = 1
+TREND_FALLING = 2
+
+# Minimum number of prices for a history-based recommendation
+MIN_DATA_POINTS = 3
+
+# Scalar copies of the scoring tables, which numba freezes as constants
+_VERY_CLOSE_DAYS, _CLOSE_DAYS, _MODERATE_DAYS = _DAYS_BINS
+_DAYS_WEIGHTS = np.array([weight for weight, _ in _DAYS_FACTORS])
+_EXCELLENT_WEIGHT = _EXCELLENT_PRICE_FACTOR[0]
+_GOOD_PRICE_WEIGHT = _PRICE_FACTORS[0][0]
+_HIGH_PRICE_WEIGHT = _PRICE_FACTORS[_HIGH_PRICE_INDEX][0]
+_RISING_WEIGHT = _TREND_FACTORS["rising"][0]
+_FALLING_WEIGHT = _TREND_FACTORS["falling"][0]
+_VOLATILE_WEIGHT = _VOLATILE_FACTOR[0]
+
+
+# Compiled eagerly for euro and integer-cent arrays, so the first call does
+# not pay for compilation (and the result is cached on disk across runs)
+@njit(["UniTuple(float64, 3)(float64[::1])", "UniTuple(float64, 3)(int64[::1])"], cache=True)
+def price_stats(prices):
+    """
+    Compute the mean, minimum and maximum of a price array in one pass.
+
+    Args:
+        prices: Contiguous float64 array of prices, or int64 array of cents
+
+    Returns:
+        Tuple of (mean, min, max), all NaN for an empty array
+    """
+    n = prices.shape[0]
+    if n == 0:
+        return np.nan, np.nan, np.nan
+
+    total = 0.0
+    lowest = prices[0]
+    highest = prices[0]
+    for i in range(n):
+        value = prices[i]
+        total += value
+        lowest = min(lowest, value)
+        highest = max(highest, value)
+
+    return total / n, lowest, highest
+
+
+@njit(cache=True, parallel=True)
+def batch_recommend(prices, days, data_points, lows, averages, volatilities, trends):
+    """
+    Score many routes at once.
+
+    All arguments are equal-length arrays, one element per route.
+
+    Args:
+        prices: Current prices (float64)
+        days: Days until departure (int64)
+        data_points: Number of historical prices (int64)
+        lows: Historical low prices (float64)
+        averages: Historical average prices (float64)
+        volatilities: Price standard deviations (float64)
+        trends: Trend codes (int8)
+
+    Returns:
+        Tuple of recommendation codes (int8) and confidences (float64)
+    """
+    n = prices.shape[0]
+    recommendations = np.empty(n, dtype=np.int8)
+    confidences = np.empty(n, dtype=np.float64)
+
+    for i in prange(n):
+        price = prices[i]
+        days_left = days[i]
+
+        # Same heuristics as PriceOptimizer._no_data_recommendation
+        if data_points[i] < MIN_DATA_POINTS:
+            if days_left <= 7:
+                recommendations[i] = BUY_NOW
+                confidences[i] = 0.5
+            elif days_left <= 30:
+                recommendations[i] = WAIT
+                confidences[i] = 0.3
+            else:
+                recommendations[i] = WAIT
+                confidences[i] = 0.4
+            continue
+
+        recommendation = WAIT
+
+        # Factor 1: Days until departure
+        if days_left <= _VERY_CLOSE_DAYS:
+            total = _DAYS_WEIGHTS[0]
+            recommendation = BUY_NOW
+        elif days_left <= _CLOSE_DAYS:
+            total = _DAYS_WEIGHTS[1]
+        elif days_left <= _MODERATE_DAYS:
+            total = _DAYS_WEIGHTS[2]
+        else:
+            total = _DAYS_WEIGHTS[3]
+        count = 1
+
+        # Factor 2: Price vs historical data
+        vs_low = price / lows[i]
+        vs_average = price / averages[i]
+        if vs_low <= _EXCELLENT_PRICE_RATIO:
+            total += _EXCELLENT_WEIGHT
+            count += 1
+            recommendation = BUY_NOW
+        elif vs_average <= _GOOD_PRICE_RATIO:
+            total += _GOOD_PRICE_WEIGHT
+            count += 1
+        elif vs_average >= _HIGH_PRICE_RATIO:
+            total += _HIGH_PRICE_WEIGHT
+            count += 1
+            if days_left > 7:
+                recommendation = WAIT
+
+        # Factor 3: Price trend
+        if trends[i] == TREND_RISING:
+            total += _RISING_WEIGHT
+            count += 1
+            recommendation = BUY_NOW
+        elif trends[i] == TREND_FALLING:
+            total += _FALLING_WEIGHT
+            count += 1
+            if recommendation != BUY_NOW:
+                recommendation = WAIT
+
+        # Factor 4: Price volatility
+        if volatilities[i] > averages[i] * _VOLATILITY_RATIO:
+            total += _VOLATILE_WEIGHT
+            count += 1
+
+        # Override with price alert if conditions are met
+        is_outlier = abs(price - averages[i]) > _OUTLIER_STDEVS * volatilities[i]
+        if is_outlier and vs_low <= _PRICE_ALERT_RATIO and days_left > 1:
+            recommendation = PRICE_ALERT
+
+        recommendations[i] = recommendation
+        confidences[i] = min(total / count, 1.0)
+
+    return recommendations, confidences
@@ -0,0 +1,203 @@
+"""
+JSON API client for Renfe train searches.
+
+The booking site loads its search results from a JSON endpoint, so querying
+it directly avoids starting a browser and parsing HTML. RenfeScraper remains
+the fallback when the API is unavailable or answers with an anti-bot page.
+"""
+
+import asyncio
+import logging
+import os
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import httpx
+except ImportError:  # httpx is optional, see the 'api' extra
+    httpx = None
+
+from .models import TrainRoute, Station, TrainType
+
+
+logger = logging.getLogger(__name__)
+
+# Placeholder endpoint and payload - adapt to the actual XHR request made by
+# the booking site's search form
+SEARCH_API_URL = "https://www.renfe.com/api/search/trains"
+
+# The endpoint above is unconfirmed, so the quick_search helpers only try the
+# API first when this environment variable is set to "1"
+USE_API_ENV = "RENFE_USE_API"
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+
+
+class RenfeApiError(Exception):
+    """Raised when a search cannot be answered through the JSON API."""
+
+
+def api_search_enabled() -> bool:
+    """Whether the quick_search helpers should try the JSON API first."""
+    return os.getenv(USE_API_ENV) == "1"
+
+
+class RenfeApiClient:
+    """Client for the JSON search endpoint, sharing one HTTP connection pool."""
+
+    def __init__(
+        self,
+        timeout: float = 10.0,
+        search_url: str = SEARCH_API_URL,
+        headers: Optional[Dict[str, str]] = None,
+        cookies: Optional[Dict[str, str]] = None
+    ):
+        """
+        Initialize the client.
+
+        Args:
+            timeout: Request timeout in seconds
+            search_url: URL of the JSON search endpoint
+            headers: Extra request headers, e.g. captured from the browser
+            cookies: Session cookies, e.g. copied from a browser context
+        """
+        self.timeout = timeout
+        self.search_url = search_url
+        # Lowercase names so captured browser headers override the defaults
+        self.headers = {
+            "user-agent": USER_AGENT,
+            "accept": "application/json",
+            **{name.lower(): value for name, value in (headers or {}).items()}
+        }
+        self.cookies = cookies or {}
+        self.client: Optional["httpx.AsyncClient"] = None
+
+    async def __aenter__(self):
+        """Async context manager entry."""
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """Async context manager exit."""
+        await self.close()
+
+    async def start(self) -> None:
+        """Open the pooled HTTP client."""
+        if httpx is None:
+            raise RenfeApiError("httpx is not installed")
+
+        self.client = httpx.AsyncClient(
+            http2=True,
+            timeout=self.timeout,
+            headers=self.headers,
+            cookies=self.cookies
+        )
+
+    async def close(self) -> None:
+        """Close the HTTP client."""
+        if self.client:
+            await self.client.aclose()
+            self.client = None
+
+    async def search_routes(
+        self,
+        origin: str,
+        destination: str,
+        departure_date: date
+    ) -> List[TrainRoute]:
+        """
+        Search for available train routes.
+
+        Args:
+            origin: Origin station name or code
+            destination: Destination station name or code
+            departure_date: Date of departure
+
+        Returns:
+            List of available train routes
+
+        Raises:
+            RenfeApiError: If the request fails or does not return JSON
+        """
+        if not self.client:
+            raise RuntimeError("Client not started. Use async with or call start() first.")
+
+        payload = {
+            "origin": origin,
+            "destination": destination,
+            "date": departure_date.isoformat()
+        }
+
+        try:
+            response = await self.client.post(self.search_url, json=payload)
+            response.raise_for_status()
+
+            # Anti-bot challenges are served as HTML pages
+            if "json" not in response.headers.get("content-type", ""):
+                raise RenfeApiError("Search API did not return JSON")
+
+            return self._parse_routes(response.json())
+
+        except (httpx.HTTPError, ValueError) as e:
+            raise RenfeApiError(f"Search API request failed: {e}") from e
+
+    async def search_many(
+        self,
+        queries: List[Tuple[str, str, date]],
+        concurrency: int = 8
+    ) -> List[List[TrainRoute]]:
+        """
+        Search several routes concurrently over the shared connection pool.
+
+        Args:
+            queries: (origin, destination, departure_date) tuples
+            concurrency: Maximum number of requests in flight
+
+        Returns:
+            Routes found for each query, in query order
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def search(origin: str, destination: str, departure_date: date) -> List[TrainRoute]:
+            async with semaphore:
+                return await self.search_routes(origin, destination, departure_date)
+
+        return await asyncio.gather(*(search(*query) for query in queries))
+
+    def _parse_routes(self, data: Any) -> List[TrainRoute]:
+        """
+        Parse train routes from a search API response.
+
+        Raises:
+            RenfeApiError: If the response does not contain a list of trains
+        """
+        trains = data.get("trains") if isinstance(data, dict) else None
+        if not isinstance(trains, list):
+            raise RenfeApiError("Search API response has no list of trains")
+
+        routes = []
+
+        for train in trains:
+            try:
+                routes.append(self._parse_route(train))
+            except (KeyError, TypeError, ValueError) as e:
+                logger.warning(f"Error parsing route from API response: {e}")
+                continue
+
+        return routes
+
+    def _parse_route(self, train: Dict[str, Any]) -> TrainRoute:
+        """Build a route from one train entry of the API response."""
+        # Placeholder field names - adapt to the actual response structure
+        departure_time = datetime.fromisoformat(train["departureTime"])
+        arrival_time = datetime.fromisoformat(train["arrivalTime"])
+
+        return TrainRoute(
+            origin=Station(**train["origin"]),
+            destination=Station(**train["destination"]),
+            departure_time=departure_time,
+            arrival_time=arrival_time,
+            train_type=TrainType(train["trainType"]),
+            train_number=train["trainNumber"],
+            duration_minutes=int((arrival_time - departure_time).total_seconds() // 60)
+        )
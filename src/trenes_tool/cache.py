@@ -0,0 +1,93 @@
+"""
+On-disk cache for train route search results.
+
+Route searches launch a full browser session, so results are kept for a
+short time to make repeated CLI invocations for the same trip instant.
+"""
+
+import hashlib
+import json
+import logging
+import time
+from datetime import date
+from pathlib import Path
+from typing import List, Optional
+
+from pydantic import TypeAdapter
+
+from .models import TrainRoute
+
+
+logger = logging.getLogger(__name__)
+
+ROUTE_CACHE_DIR = Path.home() / ".cache" / "trenes_tool"
+ROUTE_CACHE_TTL = 300  # seconds
+
+# Encodes and decodes whole route lists in pydantic-core in a single call
+_ROUTE_LIST = TypeAdapter(List[TrainRoute])
+
+
+def _route_cache_path(origin: str, destination: str, travel_date: date) -> Path:
+    """Get the cache file path for a route search."""
+    # Hash the exact query, so searches differing only in case or punctuation
+    # get their own entries
+    key = json.dumps([origin, destination, travel_date.isoformat()])
+    return ROUTE_CACHE_DIR / (hashlib.sha256(key.encode()).hexdigest() + ".json")
+
+
+def load_cached_routes(
+    origin: str,
+    destination: str,
+    travel_date: date,
+    ttl: float = ROUTE_CACHE_TTL
+) -> Optional[List[TrainRoute]]:
+    """
+    Load cached search results if they are still fresh.
+
+    Args:
+        origin: Origin station
+        destination: Destination station
+        travel_date: Date of travel
+        ttl: Maximum age of the cache entry in seconds
+
+    Returns:
+        Cached routes, or None if there is no usable cache entry
+    """
+    path = _route_cache_path(origin, destination, travel_date)
+
+    try:
+        if time.time() - path.stat().st_mtime >= ttl:
+            return None
+        return _ROUTE_LIST.validate_json(path.read_bytes())
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable route cache {path}: {e}")
+        return None
+
+
+def save_cached_routes(
+    origin: str,
+    destination: str,
+    travel_date: date,
+    routes: List[TrainRoute]
+) -> None:
+    """
+    Store search results in the route cache.
+
+    Args:
+        origin: Origin station
+        destination: Destination station
+        travel_date: Date of travel
+        routes: Routes returned by the search
+    """
+    if not routes:
+        return
+
+    path = _route_cache_path(origin, destination, travel_date)
+
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(_ROUTE_LIST.dump_json(routes))
+    except OSError as e:
+        logger.warning(f"Could not write route cache {path}: {e}")
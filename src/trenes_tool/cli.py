@@ -3,20 +3,25 @@ Command-line interface for the Trenes optimization tool.
 """
 
 import asyncio
-from datetime import date, datetime
-from typing import Optional
+import logging
+import sqlite3
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import TYPE_CHECKING, List, Optional, Tuple
 
 import click
 from rich.console import Console
 from rich.table import Table
 from rich.panel import Panel
 
-from .scraper import quick_search, RenfeScraper
-from .optimizer import PriceOptimizer
-from .models import TrainRoute
+# Scraping, storage and analysis modules pull in Playwright, pydantic and
+# NumPy, so they are imported inside the commands that need them.
+if TYPE_CHECKING:
+    from .models import TrainRoute, PriceData
 
 
 console = Console()
+logger = logging.getLogger(__name__)
 
 
 @click.group()
@@ -36,7 +41,8 @@ def main():
 @click.option("--destination", "-d", required=True, help="Destination station (e.g., 'Barcelona')")
 @click.option("--date", "-dt", required=True, help="Travel date (YYYY-MM-DD)")
 @click.option("--headless/--no-headless", default=True, help="Run browser in headless mode")
-def search(origin: str, destination: str, date: str, headless: bool):
+@click.option("--no-cache", is_flag=True, help="Ignore cached search results")
+def search(origin: str, destination: str, date: str, headless: bool, no_cache: bool):
     """Search for available train routes."""
     try:
         travel_date = datetime.strptime(date, "%Y-%m-%d").date()
@@ -44,9 +50,16 @@ def search(origin: str, destination: str, date: str, headless: bool):
         console.print("❌ Invalid date format. Use YYYY-MM-DD", style="red")
         return
 
+    from .cache import load_cached_routes, save_cached_routes
+    from .scraper import quick_search
+
     with console.status("[bold green]Searching for trains..."):
         try:
-            routes = asyncio.run(quick_search(origin, destination, travel_date, headless))
+            routes = None if no_cache else load_cached_routes(origin, destination, travel_date)
+
+            if routes is None:
+                routes = asyncio.run(quick_search(origin, destination, travel_date, headless))
+                save_cached_routes(origin, destination, travel_date, routes)
 
             if not routes:
                 console.print("❌ No routes found", style="red")
@@ -79,13 +92,91 @@ def search(origin: str, destination: str, date: str, headless: bool):
             console.print(f"❌ Error searching for routes: {e}", style="red")
 
 
+def _on_travel_date(prices_data: List["PriceData"], travel_date: date) -> List["PriceData"]:
+    """
+    Anchor scraped clock times to the searched travel date.
+
+    Result pages only show departure and arrival times, so scraped routes
+    carry a placeholder date; arrivals before the departure time are taken
+    to be on the following day.
+    """
+    dated_routes = {}
+    dated = []
+
+    for price_data in prices_data:
+        route = price_data.route
+        if route not in dated_routes:
+            departure = datetime.combine(travel_date, route.departure_time.time())
+            arrival = datetime.combine(travel_date, route.arrival_time.time())
+            if arrival < departure:
+                arrival += timedelta(days=1)
+            dated_routes[route] = route.model_copy(update={
+                "departure_time": departure,
+                "arrival_time": arrival
+            })
+        dated.append(price_data.model_copy(update={"route": dated_routes[route]}))
+
+    return dated
+
+
+def _persist_prices(prices_data: List["PriceData"], travel_date: date) -> None:
+    """Store scraped prices in a single transaction without failing the command."""
+    from .database import PriceDatabase
+
+    try:
+        with PriceDatabase() as db:
+            db.add_price_data_bulk(_on_travel_date(prices_data, travel_date))
+        logger.info(f"Stored {len(prices_data)} price records")
+    except sqlite3.Error as e:
+        logger.error(f"Error storing prices: {e}")
+        console.print(f"⚠️ Could not store prices: {e}", style="yellow")
+
+
+async def _search_and_get_prices(
+    origin: str,
+    destination: str,
+    travel_date: date,
+    train: Optional[str],
+    headless: bool
+) -> Tuple[List["TrainRoute"], List["PriceData"]]:
+    """
+    Search routes and fetch their prices using a single browser session.
+
+    Returns:
+        All routes found and the price data for the selected ones
+    """
+    from .scraper import RenfeScraper
+
+    try:
+        async with RenfeScraper(headless=headless) as scraper:
+            routes = await scraper.search_routes(origin, destination, travel_date)
+
+            # Filter by train number if specified
+            selected = [r for r in routes if r.train_number == train] if train else routes
+
+            # Get price details for each route concurrently
+            prices_data = await scraper.get_price_details_many(selected)
+
+            return routes, prices_data
+    finally:
+        await RenfeScraper.shutdown_if_idle()
+
+
 @main.command()
 @click.option("--origin", "-o", required=True, help="Origin station")
 @click.option("--destination", "-d", required=True, help="Destination station")
 @click.option("--date", "-dt", required=True, help="Travel date (YYYY-MM-DD)")
 @click.option("--train", "-t", help="Specific train number")
 @click.option("--headless/--no-headless", default=True, help="Run browser in headless mode")
-def prices(origin: str, destination: str, date: str, train: Optional[str], headless: bool):
+@click.option("--persist/--no-persist", default=False, help="Store prices in the price history database")
+def prices(
+    origin: str,
+    destination: str,
+    date: str,
+    train: Optional[str],
+    headless: bool,
+    persist: bool
+):
     """Get detailed price information for routes."""
     try:
         travel_date = datetime.strptime(date, "%Y-%m-%d").date()
@@ -93,37 +184,30 @@ def prices(origin: str, destination: str, date: str, train: Optional[str], headl
         console.print("❌ Invalid date format. Use YYYY-MM-DD", style="red")
         return
 
+    from .cache import save_cached_routes
+
     with console.status("[bold green]Getting price information..."):
         try:
-            # First search for routes
-            routes = asyncio.run(quick_search(origin, destination, travel_date, headless))
+            routes, prices_data = asyncio.run(
+                _search_and_get_prices(origin, destination, travel_date, train, headless)
+            )
+            save_cached_routes(origin, destination, travel_date, routes)
 
             if not routes:
                 console.print("❌ No routes found", style="red")
                 return
 
-            # Filter by train number if specified
-            if train:
-                routes = [r for r in routes if r.train_number == train]
-                if not routes:
-                    console.print(f"❌ Train {train} not found", style="red")
-                    return
-
-            # Get price details for each route
-            async def get_all_prices():
-                async with RenfeScraper(headless=headless) as scraper:
-                    all_prices = []
-                    for route in routes:
-                        prices_data = await scraper.get_price_details(route)
-                        all_prices.extend(prices_data)
-                    return all_prices
-
-            prices_data = asyncio.run(get_all_prices())
+            if train and not any(r.train_number == train for r in routes):
+                console.print(f"❌ Train {train} not found", style="red")
+                return
 
             if not prices_data:
                 console.print("❌ No price data found", style="red")
                 return
 
+            if persist:
+                _persist_prices(prices_data, travel_date)
+
             # Display price information
             table = Table(title=f"Price Information: {origin} → {destination} ({date})")
             table.add_column("Train", style="cyan")
@@ -148,8 +232,8 @@ def prices(origin: str, destination: str, date: str, train: Optional[str], headl
 
 
 @main.command()
-@click.option("--origin", "-o", required=True, help="Origin station")
-@click.option("--destination", "-d", required=True, help="Destination station")
+@click.option("--origin", "-o", required=True, help="Origin station code (e.g., 'MADRI')")
+@click.option("--destination", "-d", required=True, help="Destination station code (e.g., 'BCNSA')")
 @click.option("--date", "-dt", required=True, help="Travel date (YYYY-MM-DD)")
 @click.option("--price", "-p", type=float, required=True, help="Current price in euros")
 def optimize(origin: str, destination: str, date: str, price: float):
@@ -160,20 +244,17 @@ def optimize(origin: str, destination: str, date: str, price: float):
         console.print("❌ Invalid date format. Use YYYY-MM-DD", style="red")
         return
 
-    # Create a dummy route for optimization (in real usage, this would come from scraping)
-    from .models import Station, TrainType
-    dummy_route = TrainRoute(
-        origin=Station(code="ORIG", name=origin, city=origin),
-        destination=Station(code="DEST", name=destination, city=destination),
-        departure_time=datetime.combine(travel_date, datetime.min.time()),
-        arrival_time=datetime.combine(travel_date, datetime.min.time()),
-        train_type=TrainType.AVE,
-        train_number="DEMO",
-        duration_minutes=120
-    )
+    from .database import DEFAULT_DB_PATH, PriceDatabase
+    from .optimizer import PriceOptimizer
 
-    optimizer = PriceOptimizer()
-    result = optimizer.get_optimization_recommendation(dummy_route, price)
+    # Opening the database creates and migrates it, so only do that when
+    # there is price history to read
+    if Path(DEFAULT_DB_PATH).exists():
+        with PriceDatabase() as db:
+            optimizer = PriceOptimizer(database=db)
+            result = optimizer.recommend_by_codes(origin, destination, travel_date, price)
+    else:
+        result = PriceOptimizer().recommend_by_codes(origin, destination, travel_date, price)
 
     # Display recommendation
     color = {
@@ -223,7 +304,7 @@ Get price information:
 [cyan]trenes-tool prices -o "Madrid" -d "Barcelona" --date 2024-12-25[/cyan]
 
 Get optimization recommendation:
-[cyan]trenes-tool optimize -o "Madrid" -d "Barcelona" --date 2024-12-25 --price 45.50[/cyan]
+[cyan]trenes-tool optimize -o "MADRI" -d "BCNSA" --date 2024-12-25 --price 45.50[/cyan]
 
 [bold yellow]Note:[/bold yellow] This is a learning project. Web scraping functionality
 requires adaptation to actual train booking websites.""",
@@ -5,20 +5,162 @@ This module handles all database operations for storing and retrieving
 historical train price data for optimization analysis.
 """
 
+import math
 import sqlite3
 import logging
+import threading
+from types import SimpleNamespace
 from datetime import datetime, date
 from decimal import Decimal
 from pathlib import Path
-from typing import List, Optional, Dict, Any
+from typing import List, NamedTuple, Optional, Dict, Any, Iterable, Iterator, Tuple
 from contextlib import contextmanager
 
-from .models import TrainRoute, PriceData, Station, TrainType
+from .models import RECENT_WINDOW, TrainRoute, PriceData, Station, TrainType
 
 
 logger = logging.getLogger(__name__)
 
 
+def _adapt_datetime(value: datetime) -> str:
+    """Store datetimes as ISO 8601 strings."""
+    return value.isoformat(sep=" ")
+
+
+def _adapt_date(value: date) -> str:
+    """Store dates as ISO 8601 strings."""
+    return value.isoformat()
+
+
+def _convert_timestamp(value: bytes) -> datetime:
+    """Parse TIMESTAMP columns back into datetimes."""
+    return datetime.fromisoformat(value.decode())
+
+
+def _convert_date(value: bytes) -> date:
+    """Parse DATE columns back into dates."""
+    return date.fromisoformat(value.decode())
+
+
+# Explicit adapters replace sqlite3's implicit (and deprecated) defaults;
+# the converters are used for columns declared TIMESTAMP or DATE.
+sqlite3.register_adapter(datetime, _adapt_datetime)
+sqlite3.register_adapter(date, _adapt_date)
+sqlite3.register_converter("TIMESTAMP", _convert_timestamp)
+sqlite3.register_converter("DATE", _convert_date)
+
+# Database file used when no path is given
+DEFAULT_DB_PATH = "train_prices.db"
+
+# Applied to every new connection. WAL lets readers run alongside writers and,
+# together with synchronous=NORMAL, avoids an fsync on every commit.
+CONNECTION_PRAGMAS = """
+    PRAGMA journal_mode=WAL;
+    PRAGMA synchronous=NORMAL;
+    PRAGMA temp_store=MEMORY;
+    PRAGMA mmap_size=268435456;
+    PRAGMA cache_size=-65536;
+    PRAGMA foreign_keys=ON;
+"""
+
+# Hot queries are kept as constants with bound parameters so sqlite3's
+# statement cache can reuse a single prepared plan across calls.
+PRICE_HISTORY_SQL = """
+    SELECT
+        p.price_cents / 100.0 as price, p.currency, p.ticket_type, p.availability,
+        p.scraped_at, p.travel_date,
+        r.train_number, r.train_type, r.departure_time, r.arrival_time,
+        so.code as origin_code, so.name as origin_name,
+        sd.code as dest_code, sd.name as dest_name
+    FROM prices p
+    JOIN routes r ON p.route_id = r.id
+    JOIN stations so ON r.origin_id = so.id
+    JOIN stations sd ON r.destination_id = sd.id
+    WHERE so.code = ? AND sd.code = ?
+    AND p.travel_date = ?
+    AND p.scraped_at >= datetime('now', ?)
+    ORDER BY p.scraped_at DESC
+"""
+
+# Aggregates, variance and quartiles are computed by SQLite in one query so
+# callers never need to iterate over individual price rows. Prices are
+# aggregated as integer cents and converted to euros once per result. The
+# recent window mirrors PriceHistory's last RECENT_WINDOW prices.
+ROUTE_STATISTICS_SQL = f"""
+    WITH route_prices AS (
+        SELECT p.id, p.price_cents as price, p.scraped_at
+        FROM prices p
+        JOIN routes r ON p.route_id = r.id
+        JOIN stations so ON r.origin_id = so.id
+        JOIN stations sd ON r.destination_id = sd.id
+        WHERE so.code = ? AND sd.code = ? AND p.travel_date = ?
+    ),
+    recent_prices AS (
+        SELECT id, price, scraped_at FROM route_prices
+        ORDER BY scraped_at DESC, id DESC LIMIT {RECENT_WINDOW}
+    )
+    SELECT
+        COUNT(*) as data_points,
+        MIN(price) / 100.0 as min_price,
+        MAX(price) / 100.0 as max_price,
+        AVG(price) / 100.0 as avg_price,
+        (AVG(price * price) - AVG(price) * AVG(price)) / 10000.0 as variance,
+        (
+            SELECT price / 100.0 FROM route_prices ORDER BY price
+            LIMIT 1 OFFSET (SELECT COUNT(*) FROM route_prices) * 25 / 100
+        ) as p25_price,
+        (
+            SELECT price / 100.0 FROM route_prices ORDER BY price
+            LIMIT 1 OFFSET (SELECT COUNT(*) FROM route_prices) * 75 / 100
+        ) as p75_price,
+        (SELECT price / 100.0 FROM route_prices ORDER BY scraped_at, id LIMIT 1) as first_price,
+        (SELECT price / 100.0 FROM route_prices ORDER BY scraped_at DESC, id DESC LIMIT 1) as last_price,
+        (SELECT price / 100.0 FROM recent_prices ORDER BY scraped_at, id LIMIT 1) as recent_first_price,
+        (SELECT AVG(price) / 100.0 FROM recent_prices) as recent_avg_price,
+        MIN(scraped_at) as first_seen,
+        MAX(scraped_at) as last_seen
+    FROM route_prices
+"""
+
+# Same filter as PRICE_HISTORY_SQL, aggregated by SQLite so callers that only
+# need a summary never fetch the individual rows
+PRICE_SUMMARY_SQL = """
+    SELECT
+        COUNT(*) as data_points,
+        MIN(p.price_cents) / 100.0 as min_price,
+        AVG(p.price_cents) / 100.0 as avg_price,
+        MAX(p.price_cents) / 100.0 as max_price,
+        MAX(p.scraped_at) as "last_seen [TIMESTAMP]"
+    FROM prices p
+    JOIN routes r ON p.route_id = r.id
+    JOIN stations so ON r.origin_id = so.id
+    JOIN stations sd ON r.destination_id = sd.id
+    WHERE so.code = ? AND sd.code = ?
+    AND p.travel_date = ?
+    AND p.scraped_at >= datetime('now', ?)
+"""
+
+CLEANUP_OLD_PRICES_SQL = """
+    DELETE FROM prices
+    WHERE scraped_at < datetime('now', ?)
+"""
+
+
+def _days_ago(days: int) -> str:
+    """Build a SQLite datetime modifier such as '-30 days'."""
+    return f"-{int(days)} days"
+
+
+class PriceSummary(NamedTuple):
+    """Aggregate view of the recent prices for a route."""
+
+    data_points: int
+    min_price: float
+    avg_price: float
+    max_price: float
+    last_seen: datetime
+
+
 class PriceDatabase:
     """
     SQLite database for storing train price history.
@@ -27,14 +169,22 @@ class PriceDatabase:
     train price data used for optimization algorithms.
     """
 
-    def __init__(self, db_path: str = "train_prices.db"):
+    def __init__(self, db_path: str = DEFAULT_DB_PATH):
         """
         Initialize the price database.
 
         Args:
-            db_path: Path to the SQLite database file
+            db_path: Path to the SQLite database file, or ":memory:" for a
+                throwaway database (shared by all threads through a single
+                connection and discarded by close())
         """
         self.db_path = Path(db_path)
+        self._in_memory = str(db_path) == ":memory:"
+        self._local = self._connection_holder()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        self._station_id_cache: Dict[str, int] = {}
+        self._route_id_cache: Dict[Tuple[int, int, str, str], int] = {}
         self.init_database()
 
     def init_database(self) -> None:
@@ -83,7 +233,7 @@ class PriceDatabase:
                 CREATE TABLE IF NOT EXISTS prices (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     route_id INTEGER NOT NULL,
-                    price DECIMAL(10,2) NOT NULL,
+                    price_cents INTEGER NOT NULL,
                     currency TEXT DEFAULT 'EUR',
                     ticket_type TEXT NOT NULL,
                     availability INTEGER NOT NULL,
@@ -93,10 +243,24 @@ class PriceDatabase:
                 )
             """)
 
+            # Databases created before prices were stored as integer cents
+            # still have a euro-valued price column; convert it in place
+            columns = {row['name'] for row in cursor.execute("PRAGMA table_info(prices)")}
+            if 'price' in columns:
+                cursor.execute("BEGIN IMMEDIATE")
+                cursor.execute("ALTER TABLE prices RENAME COLUMN price TO price_cents")
+                cursor.execute("UPDATE prices SET price_cents = CAST(ROUND(price_cents * 100) AS INTEGER)")
+                cursor.execute("COMMIT")
+                logger.info("Converted stored prices to integer cents")
+
             # Create indexes for better query performance
+            # Resolves a route's prices for a travel date and scrape window
+            # as one range scan; including the price makes it covering for the
+            # summary query. Supersedes the older (route_id, travel_date) index.
+            cursor.execute("DROP INDEX IF EXISTS idx_prices_route_date")
             cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_prices_route_date
-                ON prices (route_id, travel_date)
+                CREATE INDEX IF NOT EXISTS idx_prices_route_date_scraped
+                ON prices (route_id, travel_date, scraped_at DESC, price_cents)
             """)
 
             cursor.execute("""
@@ -109,25 +273,86 @@ class PriceDatabase:
                 ON routes (origin_id, destination_id)
             """)
 
+            # Route lookups are served by idx_prices_route_date_scraped, which
+            # left this index only covering get_database_stats' distinct
+            # travel date count; drop it so inserts maintain one index less
+            cursor.execute("DROP INDEX IF EXISTS idx_prices_date_scraped")
+
+            # Let SQLite refresh planner statistics only where they are
+            # missing or stale; a full ANALYZE is left to maintenance()
+            cursor.execute("PRAGMA optimize")
+
             conn.commit()
             logger.info("Database initialized successfully")
 
+    def _connection_holder(self):
+        """
+        Create the object that keeps the cached connection.
+
+        File databases get one connection per thread. An in-memory database
+        only exists within the connection that created it, so every thread
+        shares that one connection instead.
+        """
+        return SimpleNamespace() if self._in_memory else threading.local()
+
+    def _connect(self) -> sqlite3.Connection:
+        """
+        Get the persistent connection for the current thread.
+
+        The connection is created lazily on first use, configured with
+        CONNECTION_PRAGMAS, and reused by every subsequent call from the same
+        thread (or from any thread, for ":memory:") until close() is called.
+
+        Returns:
+            sqlite3.Connection: Database connection
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(
+                self.db_path,
+                detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES,
+                check_same_thread=False,
+                isolation_level=None
+            )
+            conn.row_factory = sqlite3.Row  # Enable dict-like access to rows
+            conn.executescript(CONNECTION_PRAGMAS)
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
     @contextmanager
     def get_connection(self):
         """
         Context manager for database connections.
 
-        Ensures proper connection handling and automatic cleanup.
+        Hands out the cached per-thread connection instead of opening a new
+        one for every call; use close() to release it.
 
         Yields:
             sqlite3.Connection: Database connection
         """
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row  # Enable dict-like access to rows
-        try:
-            yield conn
-        finally:
+        yield self._connect()
+
+    def close(self) -> None:
+        """Close every connection opened by this database instance and forget cached IDs."""
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
             conn.close()
+        self._local = self._connection_holder()
+
+        # Cached IDs may not exist in the next connection's database
+        self._station_id_cache.clear()
+        self._route_id_cache.clear()
+
+    def __enter__(self):
+        """Context manager entry."""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit."""
+        self.close()
 
     def add_station(self, station: Station) -> int:
         """
@@ -139,29 +364,26 @@ class PriceDatabase:
         Returns:
             int: Station ID in database
         """
+        station_id = self._station_id_cache.get(station.code)
+        if station_id is not None:
+            return station_id
+
         with self.get_connection() as conn:
             cursor = conn.cursor()
 
-            # Try to get existing station
-            cursor.execute(
-                "SELECT id FROM stations WHERE code = ?",
-                (station.code,)
-            )
-            existing = cursor.fetchone()
-
-            if existing:
-                return existing['id']
-
-            # Insert new station
+            # Insert or resolve the existing station in a single statement
             cursor.execute("""
                 INSERT INTO stations (code, name, city)
                 VALUES (?, ?, ?)
+                ON CONFLICT(code) DO UPDATE SET code = code
+                RETURNING id
             """, (station.code, station.name, station.city))
 
-            station_id = cursor.lastrowid
+            station_id = cursor.fetchone()['id']
             conn.commit()
+            self._station_id_cache[station.code] = station_id
 
-            logger.info(f"Added station: {station.name} (ID: {station_id})")
+            logger.debug(f"Resolved station: {station.name} (ID: {station_id})")
             return station_id
 
     def add_route(self, route: TrainRoute) -> int:
@@ -181,34 +403,41 @@ class PriceDatabase:
             origin_id = self.add_station(route.origin)
             destination_id = self.add_station(route.destination)
 
-            # Try to get existing route
-            cursor.execute("""
-                SELECT id FROM routes
-                WHERE origin_id = ? AND destination_id = ?
-                AND train_number = ? AND departure_time = ?
-            """, (origin_id, destination_id, route.train_number, route.departure_time))
-
-            existing = cursor.fetchone()
-            if existing:
-                return existing['id']
+            key = self._route_cache_key(origin_id, destination_id, route)
+            route_id = self._route_id_cache.get(key)
+            if route_id is not None:
+                return route_id
 
-            # Insert new route
+            # Insert or resolve the existing route in a single statement
             cursor.execute("""
                 INSERT INTO routes (
                     origin_id, destination_id, train_number, train_type,
                     departure_time, arrival_time, duration_minutes
                 ) VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(origin_id, destination_id, train_number, departure_time)
+                DO UPDATE SET train_number = train_number
+                RETURNING id
             """, (
                 origin_id, destination_id, route.train_number, route.train_type.value,
                 route.departure_time, route.arrival_time, route.duration_minutes
             ))
 
-            route_id = cursor.lastrowid
+            route_id = cursor.fetchone()['id']
             conn.commit()
+            self._route_id_cache[key] = route_id
 
-            logger.info(f"Added route: {route.train_number} (ID: {route_id})")
+            logger.debug(f"Resolved route: {route.train_number} (ID: {route_id})")
             return route_id
 
+    @staticmethod
+    def _route_cache_key(
+        origin_id: int,
+        destination_id: int,
+        route: TrainRoute
+    ) -> Tuple[int, int, str, str]:
+        """Build the route ID cache key, mirroring the routes UNIQUE constraint."""
+        return (origin_id, destination_id, route.train_number, route.departure_time.isoformat())
+
     def add_price_data(self, price_data: PriceData) -> int:
         """
         Add price data to the database.
@@ -219,35 +448,196 @@ class PriceDatabase:
         Returns:
             int: Price record ID in database
         """
+        price_id = self._insert_price_data([price_data])[0][0]
+        logger.debug(f"Added price record {price_id} for {price_data.route.train_number}")
+        return price_id
+
+    def add_price_data_bulk(self, items: Iterable[PriceData]) -> List[int]:
+        """
+        Add many price data points in a single transaction.
+
+        Stations and routes are deduplicated in Python and upserted with
+        executemany before all prices are inserted at once, so storing N
+        prices costs one commit instead of several per row.
+
+        Args:
+            items: PriceData objects to store
+
+        Returns:
+            List of price record IDs, in the same order as items
+        """
+        items = list(items)
+        if not items:
+            return []
+
+        price_ids, route_count = self._insert_price_data(items)
+        logger.info(f"Added {len(price_ids)} price records across {route_count} routes")
+        return price_ids
+
+    def _insert_price_data(self, items: List[PriceData]) -> Tuple[List[int], int]:
+        """
+        Store a non-empty list of prices in one transaction.
+
+        Args:
+            items: PriceData objects to store
+
+        Returns:
+            Price record IDs in the same order as items, and the number of
+            distinct routes they belong to
+        """
         with self.get_connection() as conn:
             cursor = conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+
+            try:
+                # Add stations first, deduplicated by code and skipping cached IDs
+                stations = {}
+                for price_data in items:
+                    for station in (price_data.route.origin, price_data.route.destination):
+                        if station.code not in self._station_id_cache:
+                            stations[station.code] = station
+
+                new_station_ids = {}
+                if stations:
+                    cursor.executemany("""
+                        INSERT OR IGNORE INTO stations (code, name, city)
+                        VALUES (?, ?, ?)
+                    """, [(s.code, s.name, s.city) for s in stations.values()])
+
+                    placeholders = ", ".join("?" * len(stations))
+                    cursor.execute(
+                        f"SELECT code, id FROM stations WHERE code IN ({placeholders})",
+                        tuple(stations)
+                    )
+                    new_station_ids = {row['code']: row['id'] for row in cursor.fetchall()}
+
+                station_ids = {**self._station_id_cache, **new_station_ids}
+
+                # Add routes, deduplicated by their unique constraint
+                route_keys = []
+                routes = {}
+                for price_data in items:
+                    route = price_data.route
+                    key = self._route_cache_key(
+                        station_ids[route.origin.code],
+                        station_ids[route.destination.code],
+                        route
+                    )
+                    route_keys.append(key)
+                    if key not in self._route_id_cache:
+                        routes.setdefault(key, route)
+
+                if routes:
+                    cursor.executemany("""
+                        INSERT OR IGNORE INTO routes (
+                            origin_id, destination_id, train_number, train_type,
+                            departure_time, arrival_time, duration_minutes
+                        ) VALUES (?, ?, ?, ?, ?, ?, ?)
+                    """, [
+                        (
+                            key[0], key[1], route.train_number, route.train_type.value,
+                            route.departure_time, route.arrival_time, route.duration_minutes
+                        )
+                        for key, route in routes.items()
+                    ])
+
+                new_route_ids = {}
+                for key, route in routes.items():
+                    cursor.execute("""
+                        SELECT id FROM routes
+                        WHERE origin_id = ? AND destination_id = ?
+                        AND train_number = ? AND departure_time = ?
+                    """, (key[0], key[1], route.train_number, route.departure_time))
+                    new_route_ids[key] = cursor.fetchone()['id']
+
+                route_ids = {**self._route_id_cache, **new_route_ids}
+
+                # Insert all price data
+                rows = [
+                    (
+                        route_ids[key],
+                        price_data.price_cents,
+                        price_data.currency,
+                        price_data.ticket_type,
+                        price_data.availability,
+                        price_data.scraped_at,
+                        price_data.route.departure_time.date()
+                    )
+                    for key, price_data in zip(route_keys, items)
+                ]
+
+                cursor.executemany("""
+                    INSERT INTO prices (
+                        route_id, price_cents, currency, ticket_type,
+                        availability, scraped_at, travel_date
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?)
+                """, rows)
+
+                # Rows inserted inside one write transaction get consecutive IDs
+                cursor.execute("SELECT last_insert_rowid() AS id")
+                last_id = cursor.fetchone()['id']
+
+                cursor.execute("COMMIT")
+            except Exception:
+                cursor.execute("ROLLBACK")
+                raise
+
+            # Only cache IDs once they are known to be committed
+            self._station_id_cache.update(new_station_ids)
+            self._route_id_cache.update(new_route_ids)
+
+            return list(range(last_id - len(rows) + 1, last_id + 1)), len(set(route_keys))
+
+    def maintenance(self) -> None:
+        """
+        Refresh the query planner statistics.
 
-            # Add route first
-            route_id = self.add_route(price_data.route)
+        Run after large bulk inserts so SQLite keeps choosing the
+        route/date indexes as the prices table grows.
+        """
+        with self.get_connection() as conn:
+            conn.execute("ANALYZE")
 
-            # Insert price data
-            cursor.execute("""
-                INSERT INTO prices (
-                    route_id, price, currency, ticket_type,
-                    availability, scraped_at, travel_date
-                ) VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (
-                route_id,
-                float(price_data.price),
-                price_data.currency,
-                price_data.ticket_type,
-                price_data.availability,
-                price_data.scraped_at,
-                price_data.route.departure_time.date()
-            ))
+        logger.debug("Database statistics refreshed")
 
-            price_id = cursor.lastrowid
-            conn.commit()
+    def get_price_history(
+        self,
+        origin_code: str,
+        destination_code: str,
+        travel_date: date,
+        days_back: int = 30
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Stream historical price data for a specific route.
 
-            logger.info(f"Added price data: €{price_data.price} for route {route_id}")
-            return price_id
+        Rows are yielded one at a time, newest first, instead of being
+        materialized up front.
 
-    def get_price_history(
+        Args:
+            origin_code: Origin station code
+            destination_code: Destination station code
+            travel_date: Travel date
+            days_back: Number of days of history to retrieve
+
+        Yields:
+            Price records with route information
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+
+            cursor.execute(
+                PRICE_HISTORY_SQL,
+                (origin_code, destination_code, travel_date, _days_ago(days_back))
+            )
+
+            count = 0
+            for row in cursor:
+                count += 1
+                yield dict(row)
+
+            logger.info(f"Retrieved {count} price records for {origin_code}-{destination_code}")
+
+    def get_price_history_list(
         self,
         origin_code: str,
         destination_code: str,
@@ -255,7 +645,7 @@ class PriceDatabase:
         days_back: int = 30
     ) -> List[Dict[str, Any]]:
         """
-        Get historical price data for a specific route.
+        Get historical price data for a specific route as a list.
 
         Args:
             origin_code: Origin station code
@@ -266,32 +656,45 @@ class PriceDatabase:
         Returns:
             List of price records with route information
         """
+        return list(self.get_price_history(origin_code, destination_code, travel_date, days_back))
+
+    def get_price_summary(
+        self,
+        origin_code: str,
+        destination_code: str,
+        travel_date: date,
+        days_back: int = 30
+    ) -> Optional[PriceSummary]:
+        """
+        Summarize historical price data for a specific route.
+
+        Covers the same rows as get_price_history, but the aggregates are
+        computed by SQLite and only a single row is returned.
+
+        Args:
+            origin_code: Origin station code
+            destination_code: Destination station code
+            travel_date: Travel date
+            days_back: Number of days of history to summarize
+
+        Returns:
+            PriceSummary with count, min/average/max price and the latest
+            scrape time, or None if no data
+        """
         with self.get_connection() as conn:
             cursor = conn.cursor()
 
-            cursor.execute("""
-                SELECT
-                    p.price, p.currency, p.ticket_type, p.availability,
-                    p.scraped_at, p.travel_date,
-                    r.train_number, r.train_type, r.departure_time, r.arrival_time,
-                    so.code as origin_code, so.name as origin_name,
-                    sd.code as dest_code, sd.name as dest_name
-                FROM prices p
-                JOIN routes r ON p.route_id = r.id
-                JOIN stations so ON r.origin_id = so.id
-                JOIN stations sd ON r.destination_id = sd.id
-                WHERE so.code = ? AND sd.code = ?
-                AND p.travel_date = ?
-                AND p.scraped_at >= datetime('now', '-{} days')
-                ORDER BY p.scraped_at DESC
-            """.format(days_back), (origin_code, destination_code, travel_date))
-
-            results = []
-            for row in cursor.fetchall():
-                results.append(dict(row))
-
-            logger.info(f"Retrieved {len(results)} price records for {origin_code}-{destination_code}")
-            return results
+            cursor.execute(
+                PRICE_SUMMARY_SQL,
+                (origin_code, destination_code, travel_date, _days_ago(days_back))
+            )
+
+            result = cursor.fetchone()
+
+            if result and result['data_points'] > 0:
+                return PriceSummary(*result)
+
+            return None
 
     def get_route_statistics(
         self,
@@ -308,31 +711,25 @@ class PriceDatabase:
             travel_date: Travel date
 
         Returns:
-            Dictionary with price statistics or None if no data
+            Dictionary with price statistics (count, min/max/average,
+            population variance and standard deviation, 25th/75th
+            percentiles, first and last scraped price, and the first price
+            and average of the last RECENT_WINDOW prices) or None if no data
         """
         with self.get_connection() as conn:
             cursor = conn.cursor()
 
-            cursor.execute("""
-                SELECT
-                    COUNT(*) as data_points,
-                    MIN(p.price) as min_price,
-                    MAX(p.price) as max_price,
-                    AVG(p.price) as avg_price,
-                    MIN(p.scraped_at) as first_seen,
-                    MAX(p.scraped_at) as last_seen
-                FROM prices p
-                JOIN routes r ON p.route_id = r.id
-                JOIN stations so ON r.origin_id = so.id
-                JOIN stations sd ON r.destination_id = sd.id
-                WHERE so.code = ? AND sd.code = ? AND p.travel_date = ?
-            """, (origin_code, destination_code, travel_date))
+            cursor.execute(
+                ROUTE_STATISTICS_SQL,
+                (origin_code, destination_code, travel_date)
+            )
 
             result = cursor.fetchone()
 
             if result and result['data_points'] > 0:
                 stats = dict(result)
                 stats['price_range'] = stats['max_price'] - stats['min_price']
+                stats['price_volatility'] = math.sqrt(max(stats['variance'], 0.0))
                 return stats
 
             return None
@@ -350,14 +747,14 @@ class PriceDatabase:
         with self.get_connection() as conn:
             cursor = conn.cursor()
 
-            cursor.execute("""
-                DELETE FROM prices
-                WHERE scraped_at < datetime('now', '-{} days')
-            """.format(days_to_keep))
+            cursor.execute(CLEANUP_OLD_PRICES_SQL, (_days_ago(days_to_keep),))
 
             deleted_count = cursor.rowcount
             conn.commit()
 
+            self._station_id_cache.clear()
+            self._route_id_cache.clear()
+
             logger.info(f"Cleaned up {deleted_count} old price records")
             return deleted_count
 
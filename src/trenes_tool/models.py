@@ -2,12 +2,16 @@
 Data models for the trenes optimization tool.
 """
 
+import math
+from collections import deque
+from dataclasses import dataclass
 from datetime import datetime
-from decimal import Decimal
+from decimal import ROUND_HALF_UP, Decimal
 from enum import Enum
-from typing import List, Optional
+from typing import Any, Deque, Iterable, List, Optional
 
-from pydantic import BaseModel, Field
+import numpy as np
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr, model_validator
 
 
 class TrainType(str, Enum):
@@ -24,6 +28,8 @@ class TrainType(str, Enum):
 
 class Station(BaseModel):
     """Train station model."""
+    model_config = ConfigDict(frozen=True)
+
     code: str = Field(..., description="Station code (e.g., 'MADRI')")
     name: str = Field(..., description="Station name (e.g., 'Madrid-Puerta de Atocha')")
     city: str = Field(..., description="City name")
@@ -31,6 +37,8 @@ class Station(BaseModel):
 
 class TrainRoute(BaseModel):
     """Train route information."""
+    model_config = ConfigDict(frozen=True)
+
     origin: Station
     destination: Station
     departure_time: datetime
@@ -39,14 +47,11 @@ class TrainRoute(BaseModel):
     train_number: str
     duration_minutes: int
 
-    class Config:
-        json_encoders = {
-            datetime: lambda v: v.isoformat()
-        }
-
 
 class PriceData(BaseModel):
     """Price information for a train route."""
+    model_config = ConfigDict(frozen=True)
+
     route: TrainRoute
     price: Decimal = Field(..., description="Price in euros")
     currency: str = Field(default="EUR")
@@ -54,35 +59,209 @@ class PriceData(BaseModel):
     availability: int = Field(..., description="Number of seats available")
     scraped_at: datetime = Field(default_factory=datetime.now)
 
-    class Config:
-        json_encoders = {
-            datetime: lambda v: v.isoformat(),
-            Decimal: lambda v: float(v)
-        }
+    @model_validator(mode="before")
+    @classmethod
+    def _price_from_cents(cls, data: Any) -> Any:
+        """Accept integer price_cents in place of a Decimal price."""
+        if isinstance(data, dict) and "price" not in data and "price_cents" in data:
+            data = {**data, "price": Decimal(data["price_cents"]).scaleb(-2)}
+        return data
+
+    @property
+    def price_cents(self) -> int:
+        """Price in integer cents, rounded half up."""
+        return int(self.price.scaleb(2).to_integral_value(ROUND_HALF_UP))
+
+
+# Number of most recent prices used for short-term averages and trends
+RECENT_WINDOW = 7
+
+# Initial row capacity of the PriceHistory columns; doubled when full
+_INITIAL_CAPACITY = 16
+
+
+def _timestamp_ns(moment: datetime) -> int:
+    """Convert a datetime to integer nanoseconds since the epoch."""
+    return round(moment.timestamp() * 1_000_000) * 1000
+
+
+def _read_only(array: np.ndarray) -> np.ndarray:
+    """Mark an array view as read-only and return it."""
+    array.flags.writeable = False
+    return array
 
 
 class PriceHistory(BaseModel):
     """Historical price data for analysis."""
     route_key: str = Field(..., description="Unique identifier for route+date combination")
     prices: List[PriceData] = Field(default_factory=list)
-    lowest_price: Optional[Decimal] = None
-    highest_price: Optional[Decimal] = None
-    average_price: Optional[Decimal] = None
+    # Statistics are kept as floats; PriceData.price stays Decimal
+    lowest_price: Optional[float] = None
+    highest_price: Optional[float] = None
+    average_price: Optional[float] = None
+
+    # Columnar copies of the price data (struct of arrays) for vectorized
+    # analysis; only the first _count rows of each buffer are in use
+    _price_column: np.ndarray = PrivateAttr(default_factory=lambda: np.empty(_INITIAL_CAPACITY, dtype=np.float64))
+    _time_column: np.ndarray = PrivateAttr(default_factory=lambda: np.empty(_INITIAL_CAPACITY, dtype=np.int64))
+    _availability_column: np.ndarray = PrivateAttr(default_factory=lambda: np.empty(_INITIAL_CAPACITY, dtype=np.int64))
+
+    # Running aggregates so add_price stays O(1): Welford's online mean and
+    # variance plus a rolling window of the most recent prices
+    _count: int = PrivateAttr(default=0)
+    # Whether scrape times were appended in non-decreasing order, which lets
+    # time windows be located by binary search
+    _chronological: bool = PrivateAttr(default=True)
+    _m2: float = PrivateAttr(default=0.0)
+    _recent: Deque[float] = PrivateAttr(default_factory=lambda: deque(maxlen=RECENT_WINDOW))
+    _recent_sum: float = PrivateAttr(default=0.0)
+
+    def model_post_init(self, __context: Any) -> None:
+        """Initialize statistics for any prices passed to the constructor."""
+        self._update_statistics()
+
+    @property
+    def price_array(self) -> np.ndarray:
+        """Prices as a read-only float64 view."""
+        return _read_only(self._price_column[:self._count])
+
+    @property
+    def time_array(self) -> np.ndarray:
+        """Scrape times as a read-only int64 view of epoch nanoseconds."""
+        return _read_only(self._time_column[:self._count])
+
+    @property
+    def availability_array(self) -> np.ndarray:
+        """Seat availability as a read-only int64 view."""
+        return _read_only(self._availability_column[:self._count])
+
+    @property
+    def price_volatility(self) -> float:
+        """Sample standard deviation of all prices."""
+        return math.sqrt(self._m2 / (self._count - 1)) if self._count > 1 else 0.0
+
+    @property
+    def recent_prices(self) -> List[float]:
+        """The last RECENT_WINDOW prices, oldest first."""
+        return list(self._recent)
+
+    @property
+    def recent_average(self) -> Optional[float]:
+        """Average of the last RECENT_WINDOW prices."""
+        return self._recent_sum / len(self._recent) if self._recent else None
+
+    def prices_since(self, since: datetime) -> np.ndarray:
+        """
+        Get the prices scraped at or after a given time.
+
+        Args:
+            since: Start of the time window
+
+        Returns:
+            Prices in the window, in insertion order
+        """
+        cutoff = _timestamp_ns(since)
+        times = self.time_array
+
+        if self._chronological:
+            return self.price_array[np.searchsorted(times, cutoff, side="left"):]
+
+        return self.price_array[times >= cutoff]
 
     def add_price(self, price_data: PriceData) -> None:
         """Add new price data point."""
         self.prices.append(price_data)
-        self._update_statistics()
+        self._accumulate(price_data)
+
+    def _allocate_columns(self, capacity: int) -> None:
+        """Resize the column buffers to hold capacity rows, keeping used rows."""
+        for name in ("_price_column", "_time_column", "_availability_column"):
+            old = getattr(self, name)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:self._count] = old[:self._count]
+            setattr(self, name, new)
+
+    def _accumulate(self, price_data: PriceData) -> None:
+        """Append one price to the columns and fold it into the running statistics."""
+        price = float(price_data.price)
+
+        row = self._count
+        if row == len(self._price_column):
+            self._allocate_columns(2 * row)
+        self._price_column[row] = price
+        self._time_column[row] = _timestamp_ns(price_data.scraped_at)
+        if row and self._time_column[row] < self._time_column[row - 1]:
+            self._chronological = False
+        self._availability_column[row] = price_data.availability
+
+        self.lowest_price = price if self.lowest_price is None else min(self.lowest_price, price)
+        self.highest_price = price if self.highest_price is None else max(self.highest_price, price)
+
+        self._count += 1
+        mean = self.average_price or 0.0
+        delta = price - mean
+        mean += delta / self._count
+        self._m2 += delta * (price - mean)
+        self.average_price = mean
+
+        if len(self._recent) == self._recent.maxlen:
+            self._recent_sum -= self._recent[0]
+        self._recent.append(price)
+        self._recent_sum += price
 
     def _update_statistics(self) -> None:
-        """Update price statistics."""
-        if not self.prices:
-            return
+        """Recompute price statistics from scratch."""
+        self.lowest_price = self.highest_price = self.average_price = None
+        self._count = 0
+        self._m2 = 0.0
+        self._recent.clear()
+        self._recent_sum = 0.0
+        self._chronological = True
+        self._allocate_columns(max(len(self.prices), _INITIAL_CAPACITY))
+
+        for p in self.prices:
+            self._accumulate(p)
+
+
+@dataclass(frozen=True)
+class PriceBatch:
+    """
+    Scraped prices as parallel arrays (struct of arrays).
+
+    Row i of every array describes the same price, so numeric passes such as
+    _fastreco.price_stats can run over prices_cents directly.
+    """
+    departures: np.ndarray  # datetime64[m]
+    arrivals: np.ndarray  # datetime64[m]
+    prices_cents: np.ndarray  # int64
+    train_numbers: np.ndarray  # object
+    ticket_types: np.ndarray  # object
 
-        prices = [p.price for p in self.prices]
-        self.lowest_price = min(prices)
-        self.highest_price = max(prices)
-        self.average_price = sum(prices) / len(prices)
+    @classmethod
+    def from_prices(cls, prices: Iterable[PriceData]) -> "PriceBatch":
+        """
+        Transpose price data points into columns.
+
+        Args:
+            prices: PriceData objects, one per row
+
+        Returns:
+            PriceBatch with one row per price, in the same order
+        """
+        prices = list(prices)
+        count = len(prices)
+
+        return cls(
+            departures=np.array([p.route.departure_time for p in prices], dtype="datetime64[m]"),
+            arrivals=np.array([p.route.arrival_time for p in prices], dtype="datetime64[m]"),
+            prices_cents=np.fromiter((p.price_cents for p in prices), dtype=np.int64, count=count),
+            train_numbers=np.array([p.route.train_number for p in prices], dtype=object),
+            ticket_types=np.array([p.ticket_type for p in prices], dtype=object)
+        )
+
+    def __len__(self) -> int:
+        """Number of prices in the batch."""
+        return len(self.prices_cents)
 
 
 class OptimizationRecommendation(str, Enum):
@@ -95,6 +274,9 @@ class OptimizationRecommendation(str, Enum):
 
 class OptimizationResult(BaseModel):
     """Result of price optimization analysis."""
+    # Frozen because the optimizer hands the same cached result to every caller
+    model_config = ConfigDict(frozen=True)
+
     route_key: str
     current_price: Decimal
     recommendation: OptimizationRecommendation
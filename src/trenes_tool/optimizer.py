@@ -3,22 +3,120 @@ Price optimization engine for Spanish train tickets.
 """
 
 import logging
-from datetime import datetime, timedelta
+import math
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, timedelta
+from collections import OrderedDict
 from decimal import Decimal
-from typing import List, Optional, Dict, Any
-from statistics import mean, stdev
+from enum import Enum
+from functools import lru_cache
+from types import MappingProxyType
+from typing import List, Optional, Dict, Any, Tuple, Union
+from statistics import mean
+
+import numpy as np
 
 from .models import (
+    RECENT_WINDOW,
     PriceData,
     PriceHistory,
     OptimizationResult,
     OptimizationRecommendation,
-    TrainRoute
+    TrainRoute,
+    TrainType
 )
+from .database import PriceDatabase
 
 
 logger = logging.getLogger(__name__)
 
+# Number of recommendations kept by PriceOptimizer's LRU result cache
+RECOMMENDATION_CACHE_SIZE = 1024
+
+# Scoring tables for _generate_recommendation. Each factor is a
+# (weight, reason) pair selected by bisecting the sorted bin edges.
+
+# Days until departure: <= 3, <= 7, <= 14, later (bisect_left)
+_DAYS_BINS = (3, 7, 14)
+_DAYS_FACTORS = (
+    (0.8, "Very close to departure"),
+    (0.6, "Close to departure"),
+    (0.4, "Moderate time remaining"),
+    (0.2, "Plenty of time"),
+)
+
+# Current price vs average: <= 0.9, between, >= 1.2 (bisect_right)
+_GOOD_PRICE_RATIO = 0.9
+_HIGH_PRICE_RATIO = 1.2
+_PRICE_BINS = (math.nextafter(_GOOD_PRICE_RATIO, math.inf), _HIGH_PRICE_RATIO)
+_PRICE_FACTORS = (
+    (0.7, "Good price"),
+    None,
+    (0.8, "High price"),
+)
+_HIGH_PRICE_INDEX = 2
+
+# Within 10% of the historical low takes precedence over the average
+_EXCELLENT_PRICE_RATIO = 1.1
+_EXCELLENT_PRICE_FACTOR = (0.9, "Excellent price")
+
+_TREND_FACTORS = {
+    "falling": (0.6, "Prices are falling"),
+    "rising": (0.7, "Prices are rising"),
+}
+
+# Volatility above 10% of the average price counts as volatile pricing
+_VOLATILITY_RATIO = 0.1
+_VOLATILE_FACTOR = (0.3, "Volatile pricing")
+
+# Relative change between the first and last recent price that makes a trend
+_TREND_THRESHOLD = 0.05
+
+# A price is an outlier beyond this many standard deviations from the mean,
+# and triggers a price alert when also within 5% of the historical low
+_OUTLIER_STDEVS = 2
+_PRICE_ALERT_RATIO = 1.05
+
+_SUGGESTED_ACTIONS = MappingProxyType({
+    OptimizationRecommendation.BUY_NOW: "Book your ticket immediately",
+    OptimizationRecommendation.WAIT: "Wait and monitor prices for a few more days",
+    OptimizationRecommendation.PRICE_ALERT: "Excellent price! Consider booking if your plans are confirmed",
+    OptimizationRecommendation.NO_DATA: "Monitor prices to gather more data"
+})
+_DEFAULT_ACTION = "Monitor prices"
+
+# Integer encodings shared with the batch kernel in _fastreco
+_RECOMMENDATION_CODES = (
+    OptimizationRecommendation.BUY_NOW,
+    OptimizationRecommendation.WAIT,
+    OptimizationRecommendation.PRICE_ALERT,
+    OptimizationRecommendation.NO_DATA,
+)
+_TREND_CODES = {"stable": 0, "rising": 1, "falling": 2}
+
+
+class _Signal(str, Enum):
+    """Analysis signals that can change a recommendation."""
+    DEPARTURE_IMMINENT = "departure_imminent"
+    EXCELLENT_PRICE = "excellent_price"
+    HIGH_PRICE_EARLY = "high_price_early"
+    RISING_TREND = "rising_trend"
+    FALLING_TREND = "falling_trend"
+    PRICE_ALERT = "price_alert"
+
+
+# (recommendation, signal) -> next recommendation; pairs that are not listed
+# keep the current recommendation. Signals are applied in the order above,
+# starting from WAIT, so later signals take precedence.
+_TRANSITIONS = MappingProxyType({
+    (OptimizationRecommendation.WAIT, _Signal.DEPARTURE_IMMINENT): OptimizationRecommendation.BUY_NOW,
+    (OptimizationRecommendation.WAIT, _Signal.EXCELLENT_PRICE): OptimizationRecommendation.BUY_NOW,
+    (OptimizationRecommendation.BUY_NOW, _Signal.HIGH_PRICE_EARLY): OptimizationRecommendation.WAIT,
+    (OptimizationRecommendation.WAIT, _Signal.RISING_TREND): OptimizationRecommendation.BUY_NOW,
+    (OptimizationRecommendation.WAIT, _Signal.PRICE_ALERT): OptimizationRecommendation.PRICE_ALERT,
+    (OptimizationRecommendation.BUY_NOW, _Signal.PRICE_ALERT): OptimizationRecommendation.PRICE_ALERT,
+})
+
 
 class PriceOptimizer:
     """
@@ -26,15 +124,25 @@ class PriceOptimizer:
     and provides purchase timing recommendations.
     """
 
-    def __init__(self, confidence_threshold: float = 0.7):
+    def __init__(
+        self,
+        confidence_threshold: float = 0.7,
+        database: Optional[PriceDatabase] = None
+    ):
         """
         Initialize the optimizer.
 
         Args:
             confidence_threshold: Minimum confidence level for recommendations
+            database: Price database used by recommend_by_codes
         """
         self.confidence_threshold = confidence_threshold
+        self.database = database
         self.price_histories: Dict[str, PriceHistory] = {}
+        # LRU of results keyed by (route_key, history length, current_price,
+        # today); histories only grow, so a new price or a new day changes
+        # the key and stale entries age out
+        self._recommendation_cache: "OrderedDict[Tuple[str, int, Union[Decimal, float], date], OptimizationResult]" = OrderedDict()
 
     def add_price_data(self, price_data: PriceData) -> None:
         """
@@ -70,33 +178,151 @@ class PriceOptimizer:
         if travel_date is None:
             travel_date = route.departure_time
 
+        # Score in float64, but report the caller's price unchanged
+        price = float(current_price)
+
         route_key = self._generate_route_key(route, travel_date.date())
-        days_until_departure = (travel_date.date() - datetime.now().date()).days
+        today = datetime.now().date()
 
         # Get historical data
         history = self.price_histories.get(route_key)
 
+        # Results only change with the history, the price and the current day
+        cache_key = (route_key, len(history.prices) if history else 0, current_price, today)
+        cached = self._recommendation_cache.get(cache_key)
+        if cached is not None:
+            self._recommendation_cache.move_to_end(cache_key)
+            return cached
+
+        days_until_departure = (travel_date.date() - today).days
+
         if not history or len(history.prices) < 3:
+            recommendation = self._no_data_recommendation(
+                route_key, current_price, days_until_departure
+            )
+        else:
+            # Analyze price trends
+            analysis = self._analyze_price_trends(history, price)
+
+            # Generate recommendation based on analysis
+            recommendation = self._generate_recommendation(
+                current_price, days_until_departure, analysis, route_key
+            )
+
+        self._recommendation_cache[cache_key] = recommendation
+        if len(self._recommendation_cache) > RECOMMENDATION_CACHE_SIZE:
+            self._recommendation_cache.popitem(last=False)
+        return recommendation
+
+    def recommend_by_codes(
+        self,
+        origin_code: str,
+        destination_code: str,
+        travel_date: date,
+        current_price: Decimal
+    ) -> OptimizationResult:
+        """
+        Get optimization recommendation from stored price statistics.
+
+        Works directly from station codes and the travel date, using the
+        aggregates from PriceDatabase.get_route_statistics, so no TrainRoute
+        is needed.
+
+        Args:
+            origin_code: Origin station code
+            destination_code: Destination station code
+            travel_date: Travel date
+            current_price: Current price for the route
+
+        Returns:
+            Optimization result with recommendation and reasoning
+        """
+        price = float(current_price)
+        route_key = f"{origin_code}_{destination_code}_{travel_date}"
+        days_until_departure = (travel_date - datetime.now().date()).days
+
+        stats = None
+        if self.database is not None:
+            stats = self.database.get_route_statistics(origin_code, destination_code, travel_date)
+
+        if not stats or stats["data_points"] < 3:
             return self._no_data_recommendation(route_key, current_price, days_until_departure)
 
-        # Analyze price trends
-        analysis = self._analyze_price_trends(history, current_price)
+        analysis = self._analyze_route_statistics(stats, price)
 
-        # Generate recommendation based on analysis
-        recommendation = self._generate_recommendation(
-            current_price, days_until_departure, analysis, history
+        return self._generate_recommendation(
+            current_price, days_until_departure, analysis, route_key
         )
 
-        return recommendation
+    def batch_recommend(
+        self,
+        routes: List[TrainRoute],
+        prices: List[Decimal]
+    ) -> List[Tuple[OptimizationRecommendation, float]]:
+        """
+        Score many routes at once with the compiled recommendation kernel.
+
+        Applies the same rules as get_optimization_recommendation, without
+        building reasoning text or caching results, for batch pipelines over
+        many route and date combinations.
+
+        Args:
+            routes: Train routes, each scored for its departure date
+            prices: Current price for each route
+
+        Returns:
+            Recommendation and confidence for each route, in route order
+        """
+        from . import _fastreco
+
+        n = len(routes)
+        today = datetime.now().date()
+
+        days = np.empty(n, dtype=np.int64)
+        data_points = np.zeros(n, dtype=np.int64)
+        lows = np.ones(n, dtype=np.float64)
+        averages = np.ones(n, dtype=np.float64)
+        volatilities = np.zeros(n, dtype=np.float64)
+        trends = np.zeros(n, dtype=np.int8)
+
+        for i, route in enumerate(routes):
+            travel_date = route.departure_time.date()
+            days[i] = (travel_date - today).days
+
+            history = self.price_histories.get(self._generate_route_key(route, travel_date))
+            if not history or len(history.prices) < _fastreco.MIN_DATA_POINTS:
+                continue
+
+            data_points[i] = len(history.prices)
+            lows[i] = history.lowest_price
+            averages[i] = history.average_price
+            volatilities[i] = history.price_volatility
+            trends[i] = _TREND_CODES[self._calculate_trend(history.price_array[-RECENT_WINDOW:])]
+
+        codes, confidences = _fastreco.batch_recommend(
+            np.asarray(prices, dtype=np.float64), days, data_points,
+            lows, averages, volatilities, trends
+        )
+
+        return [
+            (_RECOMMENDATION_CODES[code], float(confidence))
+            for code, confidence in zip(codes.tolist(), confidences)
+        ]
 
     def _generate_route_key(self, route: TrainRoute, travel_date) -> str:
         """Generate unique key for route+date combination."""
-        return f"{route.origin.code}_{route.destination.code}_{travel_date}_{route.train_type}"
+        return self._route_key(route.origin.code, route.destination.code, travel_date, route.train_type)
+
+    @staticmethod
+    @lru_cache(maxsize=8192)
+    def _route_key(origin_code: str, destination_code: str, travel_date: date, train_type: TrainType) -> str:
+        """Build the route key, memoized since ingest repeats the same few routes."""
+        return f"{origin_code}_{destination_code}_{travel_date}_{train_type}"
 
     def _no_data_recommendation(
         self,
         route_key: str,
-        current_price: Decimal,
+        current_price: Union[Decimal, float],
         days_until_departure: int
     ) -> OptimizationResult:
         """Generate recommendation when no historical data is available."""
@@ -124,117 +350,147 @@ class PriceOptimizer:
             days_until_departure=days_until_departure
         )
 
-    def _analyze_price_trends(self, history: PriceHistory, current_price: Decimal) -> Dict[str, Any]:
+    def _analyze_price_trends(self, history: PriceHistory, current_price: float) -> Dict[str, Any]:
         """Analyze price trends from historical data."""
-        prices = [p.price for p in history.prices]
-        recent_prices = [p.price for p in history.prices[-7:]]  # Last 7 data points
+        # Read the running statistics maintained by PriceHistory.add_price
+        historical_low = history.lowest_price
+        historical_average = history.average_price
+        volatility = history.price_volatility
 
         analysis = {
-            "historical_low": min(prices),
-            "historical_high": max(prices),
-            "historical_average": mean(prices),
-            "recent_average": mean(recent_prices) if recent_prices else current_price,
-            "price_volatility": stdev(prices) if len(prices) > 1 else 0,
-            "current_vs_historical_low": float(current_price / min(prices)),
-            "current_vs_average": float(current_price / mean(prices)),
-            "trend": self._calculate_trend(recent_prices),
-            "is_outlier": self._is_price_outlier(current_price, prices)
+            "historical_low": historical_low,
+            "historical_high": history.highest_price,
+            "historical_average": historical_average,
+            "recent_average": history.recent_average,
+            "price_volatility": volatility,
+            "current_vs_historical_low": current_price / historical_low,
+            "current_vs_average": current_price / historical_average,
+            "trend": self._calculate_trend(history.price_array[-RECENT_WINDOW:]),
+            "is_outlier": self._is_price_outlier(
+                current_price, historical_average, volatility, len(history.prices)
+            )
         }
 
         return analysis
 
-    def _calculate_trend(self, prices: List[Decimal]) -> str:
-        """Calculate recent price trend."""
+    def _analyze_route_statistics(self, stats: Dict[str, Any], current_price: float) -> Dict[str, Any]:
+        """
+        Build the trend analysis from database route statistics.
+
+        Matches _analyze_price_trends: the trend and recent average cover the
+        last RECENT_WINDOW prices, and volatility is the sample standard
+        deviation.
+        """
+        average = stats["avg_price"]
+        data_points = stats["data_points"]
+        # The database reports the population variance
+        sample_variance = max(stats["variance"], 0.0) * data_points / (data_points - 1)
+        volatility = math.sqrt(sample_variance)
+
+        return {
+            "historical_low": stats["min_price"],
+            "historical_high": stats["max_price"],
+            "historical_average": average,
+            "recent_average": stats["recent_avg_price"],
+            "price_volatility": volatility,
+            "current_vs_historical_low": current_price / stats["min_price"],
+            "current_vs_average": current_price / average,
+            "trend": self._calculate_trend([stats["recent_first_price"], stats["last_price"]]),
+            "is_outlier": self._is_price_outlier(
+                current_price, average, volatility, stats["data_points"]
+            )
+        }
+
+    def _calculate_trend(self, prices: Union[List[float], np.ndarray]) -> str:
+        """Calculate recent price trend from the first and last prices."""
         if len(prices) < 2:
             return "stable"
 
         # Simple trend calculation
         recent_change = (prices[-1] - prices[0]) / prices[0]
 
-        if recent_change > 0.05:  # 5% increase
+        if recent_change > _TREND_THRESHOLD:
             return "rising"
-        elif recent_change < -0.05:  # 5% decrease
+        elif recent_change < -_TREND_THRESHOLD:
             return "falling"
         else:
             return "stable"
 
-    def _is_price_outlier(self, current_price: Decimal, historical_prices: List[Decimal]) -> bool:
-        """Determine if current price is an outlier."""
-        if len(historical_prices) < 3:
+    def _is_price_outlier(
+        self,
+        current_price: float,
+        average: float,
+        volatility: float,
+        data_points: int
+    ) -> bool:
+        """Determine if current price is an outlier given precomputed statistics."""
+        if data_points < 3:
             return False
 
-        avg = mean(historical_prices)
-        std = stdev(historical_prices)
-
         # Price is outlier if it's more than 2 standard deviations from mean
-        return abs(current_price - avg) > 2 * std
+        return abs(current_price - average) > _OUTLIER_STDEVS * volatility
 
     def _generate_recommendation(
         self,
-        current_price: Decimal,
+        current_price: Union[Decimal, float],
         days_until_departure: int,
         analysis: Dict[str, Any],
-        history: PriceHistory
+        route_key: str
     ) -> OptimizationResult:
         """Generate optimization recommendation based on analysis."""
-        # Initialize variables
-        recommendation = OptimizationRecommendation.WAIT
-        confidence = 0.5
-        reasoning = ""
-
-        # Decision logic based on multiple factors
+        # Decision logic based on multiple factors, each a (weight, reason) pair
+        # looked up from the module-level scoring tables; the recommendation
+        # follows from the signals raised along the way
         factors = []
+        signals = []
 
         # Factor 1: Days until departure
-        if days_until_departure <= 3:
-            factors.append(("urgent", 0.8, "Very close to departure"))
-            recommendation = OptimizationRecommendation.BUY_NOW
-        elif days_until_departure <= 7:
-            factors.append(("soon", 0.6, "Close to departure"))
-        elif days_until_departure <= 14:
-            factors.append(("moderate", 0.4, "Moderate time remaining"))
-        else:
-            factors.append(("early", 0.2, "Plenty of time"))
+        days_index = bisect_left(_DAYS_BINS, days_until_departure)
+        factors.append(_DAYS_FACTORS[days_index])
+        if days_index == 0:
+            signals.append(_Signal.DEPARTURE_IMMINENT)
 
         # Factor 2: Price vs historical data
-        if analysis["current_vs_historical_low"] <= 1.1:  # Within 10% of historical low
-            factors.append(("excellent_price", 0.9, "Excellent price"))
-            recommendation = OptimizationRecommendation.BUY_NOW
-        elif analysis["current_vs_average"] <= 0.9:  # 10% below average
-            factors.append(("good_price", 0.7, "Good price"))
-        elif analysis["current_vs_average"] >= 1.2:  # 20% above average
-            factors.append(("high_price", 0.8, "High price"))
-            if days_until_departure > 7:
-                recommendation = OptimizationRecommendation.WAIT
+        if analysis["current_vs_historical_low"] <= _EXCELLENT_PRICE_RATIO:
+            factors.append(_EXCELLENT_PRICE_FACTOR)
+            signals.append(_Signal.EXCELLENT_PRICE)
+        else:
+            price_index = bisect_right(_PRICE_BINS, analysis["current_vs_average"])
+            price_factor = _PRICE_FACTORS[price_index]
+            if price_factor:
+                factors.append(price_factor)
+            if price_index == _HIGH_PRICE_INDEX and days_until_departure > 7:
+                signals.append(_Signal.HIGH_PRICE_EARLY)
 
         # Factor 3: Price trend
-        if analysis["trend"] == "falling":
-            factors.append(("falling_trend", 0.6, "Prices are falling"))
-            if recommendation != OptimizationRecommendation.BUY_NOW:
-                recommendation = OptimizationRecommendation.WAIT
-        elif analysis["trend"] == "rising":
-            factors.append(("rising_trend", 0.7, "Prices are rising"))
-            recommendation = OptimizationRecommendation.BUY_NOW
+        trend_factor = _TREND_FACTORS.get(analysis["trend"])
+        if trend_factor:
+            factors.append(trend_factor)
+            if analysis["trend"] == "rising":
+                signals.append(_Signal.RISING_TREND)
+            else:
+                signals.append(_Signal.FALLING_TREND)
 
         # Factor 4: Price volatility
-        if analysis["price_volatility"] > analysis["historical_average"] * 0.1:
-            factors.append(("volatile", 0.3, "Volatile pricing"))
+        if analysis["price_volatility"] > analysis["historical_average"] * _VOLATILITY_RATIO:
+            factors.append(_VOLATILE_FACTOR)
 
         # Calculate overall confidence
-        confidence = mean([factor[1] for factor in factors])
+        confidence = mean([weight for weight, _ in factors])
 
         # Build reasoning
-        reasoning_parts = [factor[2] for factor in factors]
-        reasoning = ". ".join(reasoning_parts) + "."
+        reasoning = ". ".join(reason for _, reason in factors) + "."
 
         # Override with price alert if conditions are met
         if (analysis["is_outlier"] and
-            analysis["current_vs_historical_low"] <= 1.05 and
+            analysis["current_vs_historical_low"] <= _PRICE_ALERT_RATIO and
             days_until_departure > 1):
-            recommendation = OptimizationRecommendation.PRICE_ALERT
+            signals.append(_Signal.PRICE_ALERT)
+
+        recommendation = self._apply_signals(signals)
 
         return OptimizationResult(
-            route_key=history.route_key,
+            route_key=route_key,
             current_price=current_price,
             recommendation=recommendation,
             confidence=min(confidence, 1.0),
@@ -248,15 +504,17 @@ class PriceOptimizer:
             price_volatility=analysis["price_volatility"]
         )
 
+    @staticmethod
+    def _apply_signals(signals: List[_Signal]) -> OptimizationRecommendation:
+        """Run the recommendation state machine over signals, starting from WAIT."""
+        recommendation = OptimizationRecommendation.WAIT
+        for signal in signals:
+            recommendation = _TRANSITIONS.get((recommendation, signal), recommendation)
+        return recommendation
+
     def _get_suggested_action(self, recommendation: OptimizationRecommendation) -> str:
         """Get human-readable suggested action."""
-        actions = {
-            OptimizationRecommendation.BUY_NOW: "Book your ticket immediately",
-            OptimizationRecommendation.WAIT: "Wait and monitor prices for a few more days",
-            OptimizationRecommendation.PRICE_ALERT: "Excellent price! Consider booking if your plans are confirmed",
-            OptimizationRecommendation.NO_DATA: "Monitor prices to gather more data"
-        }
-        return actions.get(recommendation, "Monitor prices")
+        return _SUGGESTED_ACTIONS.get(recommendation, _DEFAULT_ACTION)
 
     def _get_optimal_window(self, days_until_departure: int, analysis: Dict[str, Any]) -> str:
         """Suggest optimal purchase window."""
@@ -264,7 +522,7 @@ class PriceOptimizer:
             return "Now - very close to departure"
         elif analysis["trend"] == "falling":
             return "2-4 days before departure"
-        elif analysis["price_volatility"] > analysis["historical_average"] * 0.1:
+        elif analysis["price_volatility"] > analysis["historical_average"] * _VOLATILITY_RATIO:
             return "1-2 weeks before departure"
         else:
             return "1-2 weeks before departure"
@@ -275,17 +533,17 @@ class PriceOptimizer:
         if not history:
             return None
 
-        prices = [p.price for p in history.prices]
+        times = history.time_array
 
         return {
             "route_key": route_key,
-            "total_data_points": len(prices),
-            "lowest_price": min(prices),
-            "highest_price": max(prices),
-            "average_price": mean(prices),
-            "price_volatility": stdev(prices) if len(prices) > 1 else 0,
+            "total_data_points": len(history.prices),
+            "lowest_price": history.lowest_price,
+            "highest_price": history.highest_price,
+            "average_price": history.average_price,
+            "price_volatility": history.price_volatility,
             "data_collection_period": {
-                "start": min(p.scraped_at for p in history.prices),
-                "end": max(p.scraped_at for p in history.prices)
+                "start": history.prices[int(times.argmin())].scraped_at,
+                "end": history.prices[int(times.argmax())].scraped_at
             }
-        }
\ No newline at end of file
+        }
@@ -5,37 +5,175 @@ Web scraper for Spanish train ticket prices.
 import asyncio
 import logging
 from datetime import datetime, date
-from typing import List, Optional, Dict, Any
-from urllib.parse import urljoin
+from functools import lru_cache
+from itertools import chain
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
 
-from playwright.async_api import async_playwright, Page, Browser
-from bs4 import BeautifulSoup
-import requests
+from playwright.async_api import async_playwright, Page, Browser, BrowserContext, Playwright
+from lxml import etree
 
-from .models import TrainRoute, PriceData, Station, TrainType
+from .api import RenfeApiClient, RenfeApiError, USER_AGENT, api_search_enabled
+from .models import TrainRoute, PriceData, PriceBatch, Station, TrainType
 
 
 logger = logging.getLogger(__name__)
 
 
+def _has_class(name: str) -> str:
+    """XPath predicate matching elements whose class list contains name."""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+def _first_text(name: str) -> etree.XPath:
+    """Compile an XPath returning the text of the first descendant with a class."""
+    return etree.XPath(f"string((.//*[{_has_class(name)}])[1])")
+
+
+def _is_clock_field(value: str) -> bool:
+    """Check for the one or two digits of an hour or minute field."""
+    return 1 <= len(value) <= 2 and value.isdigit()
+
+
+@lru_cache(maxsize=1440)
+def _parse_clock_time(value: str) -> datetime:
+    """
+    Parse an "HH:MM" departure or arrival time.
+
+    Equivalent to datetime.strptime(value, "%H:%M") without the format
+    parsing, and cached since result pages repeat the same times.
+
+    Raises:
+        ValueError: If value is not a valid "HH:MM" time
+    """
+    hours, separator, minutes = value.partition(":")
+    if not (separator and value.isascii() and _is_clock_field(hours) and _is_clock_field(minutes)):
+        raise ValueError(f"time data {value!r} does not match format '%H:%M'")
+    return datetime(1900, 1, 1, int(hours), int(minutes))
+
+
+# Candidate selectors for the search form fields, in order of preference
+ORIGIN_SELECTORS = [
+    "#origen",
+    "#origin",
+    "input[name='origen']",
+    "input[name='origin']",
+    "[placeholder*='Origen']",
+    "[placeholder*='Origin']",
+    "input[type='text']:first-child"
+]
+DESTINATION_SELECTORS = [
+    "#destino",
+    "#destination",
+    "input[name='destino']",
+    "input[name='destination']",
+    "[placeholder*='Destino']",
+    "[placeholder*='Destination']",
+    "input[type='text']:nth-child(2)"
+]
+DATE_SELECTORS = [
+    "#fecha_ida",
+    "#departure_date",
+    "input[name='fecha_ida']",
+    "input[name='departure']",
+    "input[type='date']",
+    "[placeholder*='fecha']",
+    "[placeholder*='date']"
+]
+SUBMIT_SELECTORS = [
+    "button[type='submit']",
+    "input[type='submit']",
+    "#buscar",
+    "#search",
+    ".btn-search",
+    ".search-btn",
+    "[data-testid='search-button']",
+    "button:has-text('Buscar')",
+    "button:has-text('Search')",
+    "button:has-text('Consultar')"
+]
+
+# Maps each field to the first of its selectors present in the page, or null
+FIND_FIRST_SELECTORS_JS = """
+(groups) => Object.fromEntries(Object.entries(groups).map(([field, selectors]) => [
+    field,
+    selectors.find((selector) => {
+        try {
+            return document.querySelector(selector) !== null;
+        } catch (e) {
+            return false;
+        }
+    }) ?? null
+]))
+"""
+
+# Concatenated markup of all elements matched by a locator
+OUTER_HTML_JS = "elements => elements.map((element) => element.outerHTML).join('')"
+
+# Default number of search pages open at once on the shared browser
+MAX_PARALLEL_PAGES = 4
+
+# Replaying a search on an extra page costs about as much as clicking through
+# a couple of routes, so smaller batches stay on the main page
+MIN_ROUTES_FOR_EXTRA_PAGES = 3
+
+# Captured request headers that the HTTP client sets itself; HTTP/2
+# pseudo-headers such as ":authority" are dropped as well
+_UNFORWARDED_HEADERS = {"host", "content-length", "cookie", "accept-encoding", "connection"}
+
+
 class RenfeScraper:
     """Web scraper for Renfe train tickets."""
 
     BASE_URL = "https://www.renfe.com"
     SEARCH_URL = "https://www.renfe.com/es/"
 
-    def __init__(self, headless: bool = True, timeout: int = 30000):
+    # Result markup queries, compiled once (adapt to actual website structure)
+    RESULT_SELECTOR = "[data-testid='train-result']"
+    _XP_RESULTS = etree.XPath("//*[@data-testid='train-result']")
+    _XP_DEPARTURE = _first_text("departure-time")
+    _XP_ARRIVAL = _first_text("arrival-time")
+    PRICE_PANEL_SELECTOR = ".price-selector"
+    PRICE_OPTION_SELECTOR = ".price-option"
+    _XP_PRICE_OPTIONS = etree.XPath(f"//*[{_has_class('price-option')}]")
+    _XP_PRICE = _first_text("price")
+    _XP_TICKET_TYPE = _first_text("ticket-type")
+
+    # Chromium is launched once per event loop and shared by every scraper;
+    # each scraper only opens its own lightweight browser context. Started
+    # scrapers are counted so the browser is only shut down once none is open.
+    _playwright: Optional[Playwright] = None
+    _browsers: Dict[bool, Browser] = {}
+    _browser_loop: Optional[asyncio.AbstractEventLoop] = None
+    _browser_lock: Optional[asyncio.Lock] = None
+    _open_scrapers: int = 0
+
+    def __init__(
+        self,
+        headless: bool = True,
+        timeout: int = 30000,
+        storage_state: Optional[Union[str, Path]] = None
+    ):
         """
         Initialize the scraper.
 
         Args:
             headless: Run browser in headless mode
             timeout: Page timeout in milliseconds
+            storage_state: File to load cookies and local storage from and
+                save them back to on close, so that e.g. an accepted cookie
+                banner stays dismissed across sessions
         """
         self.headless = headless
         self.timeout = timeout
+        self.storage_state = Path(storage_state) if storage_state else None
         self.browser: Optional[Browser] = None
+        self.context: Optional[BrowserContext] = None
         self.page: Optional[Page] = None
+        # Query behind the results shown on the main page, replayed by
+        # get_price_details_many on extra pages
+        self._last_search: Optional[Tuple[str, str, date, Optional[date]]] = None
+        self._counted = False
 
     async def __aenter__(self):
         """Async context manager entry."""
@@ -47,27 +185,116 @@ class RenfeScraper:
         await self.close()
 
     async def start(self) -> None:
-        """Start the browser and create a new page."""
-        playwright = await async_playwright().start()
-        self.browser = await playwright.chromium.launch(headless=self.headless)
-        self.page = await self.browser.new_page()
+        """Open a browser context on the shared browser and create a new page."""
+        # Count this scraper before the first await, so a concurrent
+        # shutdown_if_idle() cannot close the browser it is about to use
+        cls = type(self)
+        cls._bind_loop()
+        cls._open_scrapers += 1
+        self._counted = True
 
-        # Set user agent to avoid detection
-        await self.page.set_extra_http_headers({
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-        })
+        try:
+            self.browser = await self._get_browser(self.headless)
+
+            state = self.storage_state if self.storage_state and self.storage_state.exists() else None
+
+            # Set user agent to avoid detection
+            self.context = await self.browser.new_context(
+                extra_http_headers={"User-Agent": USER_AGENT},
+                storage_state=state
+            )
+            self.page = await self._new_page()
+        except BaseException:
+            await self.close()
+            raise
+
+    async def _new_page(self) -> Page:
+        """Open a new page in the scraper's browser context."""
+        return await self.context.new_page()
 
     async def close(self) -> None:
-        """Close the browser."""
-        if self.browser:
-            await self.browser.close()
+        """Close the browser context, leaving the shared browser running."""
+        try:
+            if self.context:
+                if self.storage_state:
+                    self.storage_state.parent.mkdir(parents=True, exist_ok=True)
+                    await self.context.storage_state(path=self.storage_state)
+                await self.context.close()
+                self.context = None
+                self.page = None
+        finally:
+            if self._counted:
+                type(self)._open_scrapers -= 1
+                self._counted = False
+
+    @classmethod
+    def _bind_loop(cls) -> None:
+        """Reset the shared browser state when used from a new event loop."""
+        loop = asyncio.get_running_loop()
+
+        # Playwright objects are bound to the loop that created them
+        if cls._browser_loop is not loop:
+            cls._playwright = None
+            cls._browsers = {}
+            cls._browser_loop = loop
+            cls._browser_lock = asyncio.Lock()
+            cls._open_scrapers = 0
+
+    @classmethod
+    async def _get_browser(cls, headless: bool) -> Browser:
+        """
+        Get the shared browser, launching it on first use.
+
+        Args:
+            headless: Whether the browser runs in headless mode
+
+        Returns:
+            Browser shared by all scrapers in the running event loop
+        """
+        cls._bind_loop()
+
+        async with cls._browser_lock:
+            browser = cls._browsers.get(headless)
+            if browser is None or not browser.is_connected():
+                if cls._playwright is None:
+                    cls._playwright = await async_playwright().start()
+                browser = await cls._playwright.chromium.launch(headless=headless)
+                cls._browsers[headless] = browser
+                logger.info(f"Launched shared browser (headless={headless})")
+
+        return browser
+
+    @classmethod
+    async def shutdown(cls) -> None:
+        """Close the shared browsers and stop Playwright."""
+        if cls._browser_loop is not asyncio.get_running_loop():
+            return
+
+        # Detach first, so scrapers starting meanwhile launch a fresh browser
+        browsers, cls._browsers = cls._browsers, {}
+        playwright, cls._playwright = cls._playwright, None
+
+        for browser in browsers.values():
+            await browser.close()
+
+        if playwright:
+            await playwright.stop()
+
+    @classmethod
+    async def shutdown_if_idle(cls) -> None:
+        """Shut down the shared browser unless a scraper still has it open."""
+        if cls._browser_loop is not asyncio.get_running_loop() or cls._open_scrapers:
+            return
+
+        await cls.shutdown()
 
     async def search_routes(
         self,
         origin: str,
         destination: str,
         departure_date: date,
-        return_date: Optional[date] = None
+        return_date: Optional[date] = None,
+        page: Optional[Page] = None
     ) -> List[TrainRoute]:
         """
         Search for available train routes.
@@ -77,6 +304,7 @@ class RenfeScraper:
             destination: Destination station name or code
             departure_date: Date of departure
             return_date: Optional return date for round trip
+            page: Page to run the search in (defaults to the main page)
 
         Returns:
             List of available train routes
@@ -84,24 +312,29 @@ class RenfeScraper:
         if not self.page:
             raise RuntimeError("Scraper not started. Use async with or call start() first.")
 
+        page = page or self.page
+
         try:
             # Navigate to search page
-            await self.page.goto(self.SEARCH_URL, timeout=self.timeout)
+            await page.goto(self.SEARCH_URL, timeout=self.timeout)
 
             # Wait for page to load
-            await self.page.wait_for_load_state("networkidle")
+            await page.wait_for_load_state("networkidle")
 
             # Fill search form
-            await self._fill_search_form(origin, destination, departure_date, return_date)
+            await self._fill_search_form(page, origin, destination, departure_date, return_date)
 
             # Submit search
-            await self._submit_search()
+            await self._submit_search(page)
 
             # Wait for results
-            await self.page.wait_for_selector("[data-testid='train-result']", timeout=self.timeout)
+            await page.wait_for_selector(self.RESULT_SELECTOR, timeout=self.timeout)
 
             # Parse results
-            routes = await self._parse_search_results()
+            routes = await self._parse_search_results(page)
+
+            if page is self.page:
+                self._last_search = (origin, destination, departure_date, return_date)
 
             return routes
 
@@ -109,10 +342,67 @@ class RenfeScraper:
             logger.error(f"Error searching routes: {e}")
             raise
 
+    async def capture_api_client(
+        self,
+        origin: str,
+        destination: str,
+        departure_date: date
+    ) -> Optional[RenfeApiClient]:
+        """
+        Run one browser search and set up an API client from the JSON request it makes.
+
+        The browser is only used to bootstrap the session: the captured
+        endpoint, request headers and context cookies let later searches go
+        straight to the JSON API.
+
+        Args:
+            origin: Origin station name or code
+            destination: Destination station name or code
+            departure_date: Date of departure
+
+        Returns:
+            Unstarted API client, or None if no JSON search request was seen
+        """
+        if not self.page:
+            raise RuntimeError("Scraper not started. Use async with or call start() first.")
+
+        responses = []
+
+        def record(response) -> None:
+            if response.request.resource_type in ("xhr", "fetch") and \
+                    "json" in response.headers.get("content-type", ""):
+                responses.append(response)
+
+        self.page.on("response", record)
+        try:
+            await self.search_routes(origin, destination, departure_date)
+        finally:
+            self.page.remove_listener("response", record)
+
+        search = next((r.request for r in responses if r.request.method == "POST"), None)
+        if search is None:
+            logger.warning("No JSON search request captured")
+            return None
+
+        headers = {
+            name: value for name, value in (await search.all_headers()).items()
+            if not name.startswith(":") and name.lower() not in _UNFORWARDED_HEADERS
+        }
+        cookies = {cookie["name"]: cookie["value"] for cookie in await self.context.cookies()}
+
+        logger.info(f"Captured search API request: {search.url}")
+        return RenfeApiClient(
+            timeout=self.timeout / 1000,
+            search_url=search.url,
+            headers=headers,
+            cookies=cookies
+        )
+
     async def get_price_details(
         self,
         route: TrainRoute,
-        ticket_types: Optional[List[str]] = None
+        ticket_types: Optional[List[str]] = None,
+        page: Optional[Page] = None
     ) -> List[PriceData]:
         """
         Get detailed price information for a specific route.
@@ -120,6 +410,7 @@ class RenfeScraper:
         Args:
             route: Train route to get prices for
             ticket_types: Specific ticket types to check
+            page: Page showing the search results (defaults to the main page)
 
         Returns:
             List of price data for different ticket types
@@ -127,16 +418,18 @@ class RenfeScraper:
         if not self.page:
             raise RuntimeError("Scraper not started.")
 
+        page = page or self.page
+
         try:
             # Click on the specific route to get details
             route_selector = f"[data-train-number='{route.train_number}']"
-            await self.page.click(route_selector)
+            await page.click(route_selector)
 
             # Wait for price details to load
-            await self.page.wait_for_selector(".price-selector", timeout=self.timeout)
+            await page.wait_for_selector(self.PRICE_PANEL_SELECTOR, timeout=self.timeout)
 
             # Parse price information
-            prices = await self._parse_price_details(route)
+            prices = await self._parse_price_details(route, page)
 
             return prices
 
@@ -144,8 +437,142 @@ class RenfeScraper:
             logger.error(f"Error getting price details: {e}")
             return []
 
+    async def get_price_details_many(
+        self,
+        routes: List[TrainRoute],
+        max_concurrency: int = 5
+    ) -> List[PriceData]:
+        """
+        Get price details for several routes concurrently.
+
+        Search results come from a form submission, so they cannot be
+        reopened by URL. Routes are instead clicked through one at a time on
+        the main page, alongside up to max_concurrency - 1 extra pages that
+        first replay the last search_routes query and then take routes from
+        the same queue. An extra page whose search fails leaves its share to
+        the others. Batches of fewer than MIN_ROUTES_FOR_EXTRA_PAGES routes
+        are clicked through on the main page only.
+
+        Args:
+            routes: Train routes from the current search results
+            max_concurrency: Maximum number of pages clicking through routes
+
+        Returns:
+            Price data for all routes, in route order
+        """
+        if not self.page:
+            raise RuntimeError("Scraper not started.")
+
+        results: List[List[PriceData]] = [[] for _ in routes]
+        pending = iter(enumerate(routes))
+
+        async def click_through(page: Page) -> None:
+            for index, route in pending:
+                results[index] = await self.get_price_details(route, page=page)
+
+        async def replay_and_click_through() -> None:
+            page = await self._new_page()
+            try:
+                await self.search_routes(*self._last_search, page=page)
+                await click_through(page)
+            except Exception as e:
+                logger.warning(f"Extra results page failed: {e}")
+            finally:
+                await page.close()
+
+        extra_pages = 0
+        if self._last_search is not None and len(routes) >= MIN_ROUTES_FOR_EXTRA_PAGES:
+            extra_pages = max(0, min(max_concurrency, len(routes)) - 1)
+
+        await asyncio.gather(
+            click_through(self.page),
+            *(replay_and_click_through() for _ in range(extra_pages))
+        )
+        return list(chain.from_iterable(results))
+
+    async def extract_prices_batch(
+        self,
+        routes: List[TrainRoute],
+        max_concurrency: int = 5
+    ) -> PriceBatch:
+        """
+        Get price details for several routes as columnar arrays.
+
+        Args:
+            routes: Train routes to get prices for
+            max_concurrency: Maximum number of routes fetched at once
+
+        Returns:
+            PriceBatch with one row per price found
+        """
+        return PriceBatch.from_prices(await self.get_price_details_many(routes, max_concurrency))
+
+    async def search_many(
+        self,
+        queries: List[Tuple[str, str, date]],
+        concurrency: int = MAX_PARALLEL_PAGES
+    ) -> List[List[TrainRoute]]:
+        """
+        Search several routes concurrently.
+
+        Each query runs in its own page of the scraper's browser context, so
+        cookies and the HTTP cache are shared, with at most concurrency pages
+        open at once.
+
+        Args:
+            queries: (origin, destination, departure_date) tuples
+            concurrency: Maximum number of searches run at once
+
+        Returns:
+            Routes found for each query, in query order
+        """
+        if not self.context:
+            raise RuntimeError("Scraper not started. Use async with or call start() first.")
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def search(origin: str, destination: str, departure_date: date) -> List[TrainRoute]:
+            async with semaphore:
+                page = await self._new_page()
+                try:
+                    return await self.search_routes(origin, destination, departure_date, page=page)
+                except Exception as e:
+                    logger.warning(f"Search {origin} -> {destination} on {departure_date} failed: {e}")
+                    return []
+                finally:
+                    await page.close()
+
+        return await asyncio.gather(*(search(*query) for query in queries))
+
+    async def search_dates(
+        self,
+        origin: str,
+        destination: str,
+        dates: Iterable[date],
+        concurrency: int = MAX_PARALLEL_PAGES
+    ) -> Dict[date, List[TrainRoute]]:
+        """
+        Search one origin-destination pair on several dates concurrently.
+
+        Args:
+            origin: Origin station name or code
+            destination: Destination station name or code
+            dates: Departure dates to search
+            concurrency: Maximum number of searches run at once
+
+        Returns:
+            Routes found for each date, in the order the dates were given
+        """
+        dates = list(dict.fromkeys(dates))
+        results = await self.search_many(
+            [(origin, destination, departure_date) for departure_date in dates],
+            concurrency
+        )
+        return dict(zip(dates, results))
+
     async def _fill_search_form(
         self,
+        page: Page,
         origin: str,
         destination: str,
         departure_date: date,
@@ -154,129 +581,62 @@ class RenfeScraper:
         """Fill the search form with travel details."""
         try:
             # Wait for the page to load completely
-            await self.page.wait_for_load_state("networkidle")
-
-            # Try multiple common selector patterns for train booking sites
-            origin_selectors = [
-                "#origen",
-                "#origin",
-                "input[name='origen']",
-                "input[name='origin']",
-                "[placeholder*='Origen']",
-                "[placeholder*='Origin']",
-                "input[type='text']:first-child"
-            ]
-
-            # Fill origin
-            origin_filled = False
-            for selector in origin_selectors:
-                try:
-                    await self.page.wait_for_selector(selector, timeout=2000)
-                    await self.page.fill(selector, origin)
-                    await self.page.wait_for_timeout(1000)
-                    origin_filled = True
-                    logger.info(f"Origin filled using selector: {selector}")
-                    break
-                except:
+            await page.wait_for_load_state("networkidle")
+
+            # Find the first matching selector for every field in one round-trip
+            hits = await page.evaluate(FIND_FIRST_SELECTORS_JS, {
+                "origin": ORIGIN_SELECTORS,
+                "destination": DESTINATION_SELECTORS,
+                "date": DATE_SELECTORS
+            })
+
+            for field, value in (("origin", origin), ("destination", destination)):
+                selector = hits.get(field)
+                if not selector:
+                    logger.warning(f"Could not find {field} input field")
                     continue
 
-            if not origin_filled:
-                logger.warning("Could not find origin input field")
-
-            # Fill destination
-            destination_selectors = [
-                "#destino",
-                "#destination",
-                "input[name='destino']",
-                "input[name='destination']",
-                "[placeholder*='Destino']",
-                "[placeholder*='Destination']",
-                "input[type='text']:nth-child(2)"
-            ]
-
-            destination_filled = False
-            for selector in destination_selectors:
-                try:
-                    await self.page.wait_for_selector(selector, timeout=2000)
-                    await self.page.fill(selector, destination)
-                    await self.page.wait_for_timeout(1000)
-                    destination_filled = True
-                    logger.info(f"Destination filled using selector: {selector}")
-                    break
-                except:
-                    continue
+                await page.fill(selector, value)
+                logger.info(f"{field.capitalize()} filled using selector: {selector}")
 
-            if not destination_filled:
-                logger.warning("Could not find destination input field")
-
-            # Fill departure date
-            date_selectors = [
-                "#fecha_ida",
-                "#departure_date",
-                "input[name='fecha_ida']",
-                "input[name='departure']",
-                "input[type='date']",
-                "[placeholder*='fecha']",
-                "[placeholder*='date']"
-            ]
-
-            date_str = departure_date.strftime("%d/%m/%Y")
+            # Fill departure date, trying different date formats
+            selector = hits.get("date")
             date_filled = False
 
-            for selector in date_selectors:
-                try:
-                    await self.page.wait_for_selector(selector, timeout=2000)
-
-                    # Try different date formats
-                    date_formats = [
-                        departure_date.strftime("%d/%m/%Y"),
-                        departure_date.strftime("%Y-%m-%d"),
-                        departure_date.strftime("%m/%d/%Y")
-                    ]
-
-                    for date_format in date_formats:
-                        try:
-                            await self.page.fill(selector, date_format)
-                            date_filled = True
-                            logger.info(f"Date filled using selector: {selector} with format: {date_format}")
-                            break
-                        except:
-                            continue
-
-                    if date_filled:
+            if selector:
+                date_formats = [
+                    departure_date.strftime("%d/%m/%Y"),
+                    departure_date.strftime("%Y-%m-%d"),
+                    departure_date.strftime("%m/%d/%Y")
+                ]
+
+                for date_format in date_formats:
+                    try:
+                        await page.fill(selector, date_format)
+                        date_filled = True
+                        logger.info(f"Date filled using selector: {selector} with format: {date_format}")
                         break
-
-                except:
-                    continue
+                    except Exception:
+                        continue
 
             if not date_filled:
                 logger.warning("Could not find date input field")
 
+            # Let autocompletes triggered by the fills settle
+            await page.wait_for_load_state("networkidle")
+
         except Exception as e:
             logger.error(f"Error filling search form: {e}")
             raise
 
-    async def _submit_search(self) -> None:
+    async def _submit_search(self, page: Page) -> None:
         """Submit the search form."""
         # Try multiple common search button selectors
-        search_selectors = [
-            "button[type='submit']",
-            "input[type='submit']",
-            "#buscar",
-            "#search",
-            ".btn-search",
-            ".search-btn",
-            "[data-testid='search-button']",
-            "button:has-text('Buscar')",
-            "button:has-text('Search')",
-            "button:has-text('Consultar')"
-        ]
-
         search_clicked = False
-        for selector in search_selectors:
+        for selector in SUBMIT_SELECTORS:
             try:
-                await self.page.wait_for_selector(selector, timeout=2000)
-                await self.page.click(selector)
+                await page.wait_for_selector(selector, timeout=2000)
+                await page.click(selector)
                 search_clicked = True
                 logger.info(f"Search submitted using selector: {selector}")
                 break
@@ -286,18 +646,28 @@ class RenfeScraper:
         if not search_clicked:
             logger.warning("Could not find search button")
             # Try pressing Enter on the last filled field as fallback
-            await self.page.keyboard.press("Enter")
+            await page.keyboard.press("Enter")
+
+    async def _outer_html(self, page: Page, selector: str) -> str:
+        """Serialize only the elements matching selector, in one round-trip."""
+        return await page.locator(selector).evaluate_all(OUTER_HTML_JS)
 
-    async def _parse_search_results(self) -> List[TrainRoute]:
+    async def _parse_search_results(self, page: Page) -> List[TrainRoute]:
         """Parse search results from the page."""
-        # Get page content
-        content = await self.page.content()
-        soup = BeautifulSoup(content, 'html.parser')
+        # Only transfer the result elements rather than the whole page
+        content = await self._outer_html(page, self.RESULT_SELECTOR)
+        return self._parse_search_html(content)
+
+    def _parse_search_html(self, content: str) -> List[TrainRoute]:
+        """Parse train routes from search results HTML."""
+        tree = etree.HTML(content)
+        if tree is None:
+            return []
 
         routes = []
 
         # Find all train result elements
-        train_results = soup.find_all("[data-testid='train-result']")
+        train_results = self._XP_RESULTS(tree)
 
         for result in train_results:
             try:
@@ -319,12 +689,12 @@ class RenfeScraper:
         try:
             # Extract basic information (adapt selectors to actual website)
             train_number = element.get("data-train-number", "")
-            departure_time_str = element.find(".departure-time").text.strip()
-            arrival_time_str = element.find(".arrival-time").text.strip()
+            departure_time_str = self._XP_DEPARTURE(element).strip()
+            arrival_time_str = self._XP_ARRIVAL(element).strip()
 
             # Parse times (this would need adjustment based on actual format)
-            departure_time = datetime.strptime(departure_time_str, "%H:%M")
-            arrival_time = datetime.strptime(arrival_time_str, "%H:%M")
+            departure_time = _parse_clock_time(departure_time_str)
+            arrival_time = _parse_clock_time(arrival_time_str)
 
             # Create route object (with placeholder data)
             route = TrainRoute(
@@ -343,15 +713,22 @@ class RenfeScraper:
             logger.error(f"Error extracting route data: {e}")
             return None
 
-    async def _parse_price_details(self, route: TrainRoute) -> List[PriceData]:
+    async def _parse_price_details(self, route: TrainRoute, page: Page) -> List[PriceData]:
         """Parse price details for a specific route."""
-        content = await self.page.content()
-        soup = BeautifulSoup(content, 'html.parser')
+        # Only transfer the price options rather than the whole page
+        content = await self._outer_html(page, self.PRICE_OPTION_SELECTOR)
+        return self._parse_price_html(content, route)
+
+    def _parse_price_html(self, content: str, route: TrainRoute) -> List[PriceData]:
+        """Parse price options for a route from HTML."""
+        tree = etree.HTML(content)
+        if tree is None:
+            return []
 
         prices = []
 
         # Find price elements (adapt to actual website structure)
-        price_elements = soup.find_all(".price-option")
+        price_elements = self._XP_PRICE_OPTIONS(tree)
 
         for element in price_elements:
             try:
@@ -368,10 +745,10 @@ class RenfeScraper:
         """Extract price information from a DOM element."""
         # Placeholder implementation - adapt to actual website structure
         try:
-            price_text = element.find(".price").text.strip()
+            price_text = self._XP_PRICE(element).strip()
             price_value = float(price_text.replace("€", "").replace(",", "."))
 
-            ticket_type = element.find(".ticket-type").text.strip()
+            ticket_type = self._XP_TICKET_TYPE(element).strip()
             availability = int(element.get("data-availability", "0"))
 
             price_data = PriceData(
@@ -393,19 +770,86 @@ async def quick_search(
     origin: str,
     destination: str,
     departure_date: date,
-    headless: bool = True
+    headless: bool = True,
+    use_api: Optional[bool] = None,
+    keep_browser: bool = False
 ) -> List[TrainRoute]:
     """
     Quick search function for train routes.
 
+    Optionally tries the JSON search API first, falling back to the browser.
+    Unless keep_browser is set, the shared browser is shut down afterwards
+    if no other scraper on the event loop still has it open.
+
     Args:
         origin: Origin station
         destination: Destination station
         departure_date: Date of travel
         headless: Run browser in headless mode
+        use_api: Try the JSON search API first (defaults to the
+            RENFE_USE_API environment variable being "1")
+        keep_browser: Leave the shared browser running for later searches
 
     Returns:
         List of available routes
     """
-    async with RenfeScraper(headless=headless) as scraper:
-        return await scraper.search_routes(origin, destination, departure_date)
\ No newline at end of file
+    if use_api is None:
+        use_api = api_search_enabled()
+
+    if use_api:
+        try:
+            async with RenfeApiClient() as client:
+                return await client.search_routes(origin, destination, departure_date)
+        except RenfeApiError as e:
+            logger.info(f"API search unavailable, using the browser: {e}")
+
+    try:
+        async with RenfeScraper(headless=headless) as scraper:
+            return await scraper.search_routes(origin, destination, departure_date)
+    finally:
+        if not keep_browser:
+            await RenfeScraper.shutdown_if_idle()
+
+
+async def quick_search_many(
+    queries: List[Tuple[str, str, date]],
+    headless: bool = True,
+    concurrency: int = MAX_PARALLEL_PAGES,
+    use_api: Optional[bool] = None,
+    keep_browser: bool = False
+) -> List[List[TrainRoute]]:
+    """
+    Search several routes concurrently.
+
+    Optionally tries the JSON search API first, falling back to pages on one
+    browser. Unless keep_browser is set, the shared browser is shut down
+    afterwards if no other scraper on the event loop still has it open.
+
+    Args:
+        queries: (origin, destination, departure_date) tuples
+        headless: Run browser in headless mode
+        concurrency: Maximum number of searches run at once
+        use_api: Try the JSON search API first (defaults to the
+            RENFE_USE_API environment variable being "1")
+        keep_browser: Leave the shared browser running for later searches
+
+    Returns:
+        Routes found for each query, in query order
+    """
+    if use_api is None:
+        use_api = api_search_enabled()
+
+    if use_api:
+        try:
+            async with RenfeApiClient() as client:
+                return await client.search_many(queries)
+        except RenfeApiError as e:
+            logger.info(f"API search unavailable, using the browser: {e}")
+
+    try:
+        async with RenfeScraper(headless=headless) as scraper:
+            return await scraper.search_many(queries, concurrency)
+    finally:
+        if not keep_browser:
+            await RenfeScraper.shutdown_if_idle()
+
@@ -7,6 +7,7 @@ and stores results in the database for analysis.
 
 import asyncio
 import logging
+import os
 from datetime import date, datetime, timedelta
 from decimal import Decimal
 
@@ -20,9 +21,97 @@ logging.basicConfig(
 import sys
 sys.path.insert(0, 'src')
 
-from trenes_tool.scraper import RenfeScraper
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+from trenes_tool._fastreco import price_stats
+from trenes_tool.cache import ROUTE_CACHE_DIR
+from trenes_tool.scraper import (
+    RenfeScraper,
+    ORIGIN_SELECTORS,
+    DESTINATION_SELECTORS,
+    DATE_SELECTORS,
+    SUBMIT_SELECTORS
+)
 from trenes_tool.database import PriceDatabase
-from trenes_tool.models import Station, TrainRoute, PriceData, TrainType
+from trenes_tool.models import Station, TrainRoute, PriceData, PriceBatch, TrainType
+
+
+# Set RENFE_DEBUG=1 to watch the browser while the script runs
+DEBUG = os.getenv("RENFE_DEBUG") == "1"
+
+# Page timeout in milliseconds
+TIMEOUT = 15000
+
+# Elements that look like train results on the results page
+TRAIN_RESULT_SELECTOR = "[class*='tren'], [class*='train'], [class*='viaje']"
+
+# Keep the database on disk for inspection only when debugging
+DB_PATH = "test_prices.db" if DEBUG else ":memory:"
+
+# Browser cookies and local storage kept between runs, outside the repository
+STORAGE_STATE = ROUTE_CACHE_DIR / "renfe_state.json"
+
+# Attributes of every input and button, collected in a single evaluate call
+INPUT_INFO_JS = """
+() => Array.from(document.querySelectorAll("input"), (e, i) => ({
+    index: i,
+    type: e.getAttribute("type"),
+    name: e.getAttribute("name"),
+    id: e.getAttribute("id"),
+    placeholder: e.getAttribute("placeholder")
+}))
+"""
+
+# Fills each field with the first matching selector and submits the form;
+# results are waited for from Python, since submitting may navigate away and
+# destroy this script's execution context
+SEARCH_JS = """
+({fields, submitSelectors}) => {
+    const first = (selectors) => {
+        for (const selector of selectors) {
+            try {
+                const element = document.querySelector(selector);
+                if (element) return element;
+            } catch (e) {}
+        }
+        return null;
+    };
+
+    for (const [selectors, value] of fields) {
+        const input = first(selectors);
+        if (!input) continue;
+        input.focus();
+        input.value = value;
+        input.dispatchEvent(new Event("input", {bubbles: true}));
+        input.dispatchEvent(new Event("change", {bubbles: true}));
+    }
+
+    const button = first(submitSelectors);
+    if (button) {
+        button.click();
+    } else {
+        document.querySelector("form")?.requestSubmit();
+    }
+}
+"""
+
+BUTTON_INFO_JS = """
+() => Array.from(document.querySelectorAll("button"), (e, i) => ({
+    index: i,
+    text: e.textContent,
+    type: e.getAttribute("type")
+}))
+"""
+
+
+async def save_screenshot(page, name: str) -> None:
+    """Save a viewport screenshot as JPEG when debugging."""
+    if not DEBUG:
+        return
+
+    path = f"{name}.jpg"
+    await page.screenshot(path=path, type="jpeg", quality=60, full_page=False)
+    print(f"Screenshot saved: {path}")
 
 
 async def test_murcia_madrid_scraping():
@@ -39,7 +128,7 @@ async def test_murcia_madrid_scraping():
     print("Testing Murcia-Madrid train scraping...")
 
     # Initialize database
-    db = PriceDatabase("test_prices.db")
+    db = PriceDatabase(DB_PATH)
     print("Database initialized")
 
     # Test date (tomorrow for realistic results)
@@ -47,17 +136,17 @@ async def test_murcia_madrid_scraping():
     print(f"Testing date: {test_date}")
 
     try:
-        # Initialize scraper (non-headless for debugging)
-        async with RenfeScraper(headless=False, timeout=45000) as scraper:
+        # Initialize scraper (headed when debugging)
+        # Reuse cookies from earlier runs so consent banners stay dismissed
+        async with RenfeScraper(headless=not DEBUG, timeout=TIMEOUT, storage_state=STORAGE_STATE) as scraper:
             print("Browser started, navigating to Renfe...")
 
             # Navigate to Renfe homepage
-            await scraper.page.goto(scraper.SEARCH_URL, timeout=60000)
+            await scraper.page.goto(scraper.SEARCH_URL, timeout=TIMEOUT)
             print("Renfe page loaded")
 
             # Take a screenshot for debugging
-            await scraper.page.screenshot(path="renfe_homepage.png")
-            print("Screenshot saved: renfe_homepage.png")
+            await save_screenshot(scraper.page, "renfe_homepage")
 
             # Get page title to confirm we're on the right page
             title = await scraper.page.title()
@@ -65,74 +154,61 @@ async def test_murcia_madrid_scraping():
 
             # Get all input fields to understand the form structure
             print("Analyzing form structure...")
-            inputs = await scraper.page.query_selector_all("input")
-
-            input_info = []
-            for i, input_elem in enumerate(inputs):
-                input_type = await input_elem.get_attribute("type")
-                input_name = await input_elem.get_attribute("name")
-                input_id = await input_elem.get_attribute("id")
-                input_placeholder = await input_elem.get_attribute("placeholder")
-
-                input_info.append({
-                    "index": i,
-                    "type": input_type,
-                    "name": input_name,
-                    "id": input_id,
-                    "placeholder": input_placeholder
-                })
+            # Read all attributes in one round-trip instead of one per attribute
+            input_info = await scraper.page.evaluate(INPUT_INFO_JS)
 
             print(f"Found {len(input_info)} input fields:")
             for info in input_info[:10]:  # Show first 10
                 print(f"  - Type: {info['type']}, Name: {info['name']}, ID: {info['id']}, Placeholder: {info['placeholder']}")
 
             # Look for buttons
-            buttons = await scraper.page.query_selector_all("button")
-            print(f"Found {len(buttons)} buttons:")
+            button_info = await scraper.page.evaluate(BUTTON_INFO_JS)
+            print(f"Found {len(button_info)} buttons:")
 
-            for i, button in enumerate(buttons[:5]):  # Show first 5
-                button_text = await button.text_content()
-                button_type = await button.get_attribute("type")
-                print(f"  - Button {i}: '{button_text}' (type: {button_type})")
+            for info in button_info[:5]:  # Show first 5
+                print(f"  - Button {info['index']}: '{info['text']}' (type: {info['type']})")
 
-            # Try to fill the search form
-            print("Attempting to fill search form...")
+            # Fill and submit the search form in a single round-trip
+            print("Filling and submitting search form...")
             try:
-                await scraper._fill_search_form("Murcia", "Madrid", test_date)
-                print("Form filled successfully")
-
-                # Take another screenshot
-                await scraper.page.screenshot(path="form_filled.png")
-                print("Screenshot saved: form_filled.png")
-
-                # Try to submit the search
-                print("Submitting search...")
-                await scraper._submit_search()
-
-                # Wait for results page
-                await scraper.page.wait_for_timeout(5000)
+                # Wait for the results page so the result selector is not
+                # matched against the homepage; a single-page search updates
+                # in place without navigating
+                try:
+                    async with scraper.page.expect_navigation(wait_until="commit", timeout=TIMEOUT):
+                        await scraper.page.evaluate(SEARCH_JS, {
+                            "fields": [
+                                [ORIGIN_SELECTORS, "Murcia"],
+                                [DESTINATION_SELECTORS, "Madrid"],
+                                [DATE_SELECTORS, test_date.strftime("%d/%m/%Y")]
+                            ],
+                            "submitSelectors": SUBMIT_SELECTORS
+                        })
+                except PlaywrightTimeoutError:
+                    print("Search did not navigate; waiting for results in place")
+
+                try:
+                    await scraper.page.wait_for_selector(TRAIN_RESULT_SELECTOR, timeout=TIMEOUT)
+                except PlaywrightTimeoutError:
+                    print("No train results appeared before the timeout")
+
+                result_count = await scraper.page.locator(TRAIN_RESULT_SELECTOR).count()
 
                 # Take screenshot of results
-                await scraper.page.screenshot(path="search_results.png")
-                print("Results screenshot saved: search_results.png")
-
-                # Get page content for analysis
-                content = await scraper.page.content()
-                print(f"Page content length: {len(content)} characters")
+                await save_screenshot(scraper.page, "search_results")
 
-                # Look for train-related elements
-                train_elements = await scraper.page.query_selector_all("[class*='tren'], [class*='train'], [class*='viaje']")
-                print(f"Found {len(train_elements)} potential train elements")
+                print(f"Found {result_count} potential train elements")
 
             except Exception as e:
                 print(f"Error during form interaction: {e}")
 
                 # Still take a screenshot for debugging
-                await scraper.page.screenshot(path="error_state.png")
-                print("Error screenshot saved: error_state.png")
+                await save_screenshot(scraper.page, "error_state")
 
     except Exception as e:
         print(f"Scraping failed: {e}")
+    finally:
+        await RenfeScraper.shutdown()
 
     # Test database functionality with dummy data
     print("\nTesting database functionality...")
@@ -145,24 +221,34 @@ async def test_murcia_madrid_scraping():
     test_route = TrainRoute(
         origin=murcia_station,
         destination=madrid_station,
-        departure_time=datetime.combine(test_date, datetime.min.time().replace(hour=8, minute=30)),
-        arrival_time=datetime.combine(test_date, datetime.min.time().replace(hour=12, minute=15)),
+        departure_time=datetime(test_date.year, test_date.month, test_date.day, 8, 30),
+        arrival_time=datetime(test_date.year, test_date.month, test_date.day, 12, 15),
         train_type=TrainType.AVE,
         train_number="AVE02104",
         duration_minutes=225
     )
 
-    # Create test price data
-    test_price = PriceData(
-        route=test_route,
-        price=Decimal("45.50"),
-        ticket_type="Turista",
-        availability=87
-    )
+    # Create test price data, one per ticket type
+    test_prices = [
+        PriceData(route=test_route, price=Decimal(price), ticket_type=ticket_type, availability=availability)
+        for ticket_type, price, availability in (
+            ("Turista", "45.50", 87),
+            ("Turista Plus", "58.20", 34),
+            ("Preferente", "79.90", 12),
+        )
+    ]
 
-    # Store in database
-    price_id = db.add_price_data(test_price)
-    print(f"Test price data stored with ID: {price_id}")
+    # Summarize the batch from its columnar price array
+    batch = PriceBatch.from_prices(test_prices)
+    average, lowest, highest = price_stats(batch.prices_cents)
+    print(f"Batch of {len(batch)} prices: avg €{average / 100:.2f}, min €{lowest / 100:.2f}, max €{highest / 100:.2f}")
+
+    # Store in database in a single transaction
+    price_ids = db.add_price_data_bulk(test_prices)
+    print(f"Test price data stored with IDs: {price_ids}")
+
+    # Refresh planner statistics after the bulk insert
+    db.maintenance()
 
     # Get database statistics
     stats = db.get_database_stats()
@@ -170,15 +256,19 @@ async def test_murcia_madrid_scraping():
     for key, value in stats.items():
         print(f"  - {key}: {value}")
 
-    # Test price history retrieval
-    history = db.get_price_history("MURCI", "MADRI", test_date)
-    print(f"Retrieved {len(history)} historical price records")
+    # Summarize the price history in SQLite without fetching its rows
+    summary = db.get_price_summary("MURCI", "MADRI", test_date)
+
+    if summary:
+        print(f"Found {summary.data_points} historical price records")
 
-    if history:
-        latest = history[0]
+        latest = next(db.get_price_history("MURCI", "MADRI", test_date))
         print(f"Latest price: €{latest['price']} ({latest['ticket_type']})")
+        print(f"Price summary: avg €{summary.avg_price:.2f}, min €{summary.min_price:.2f}, max €{summary.max_price:.2f}")
+    else:
+        print("No historical price records found")
 
-    print("\nTest completed! Check the screenshots and database for results.")
+    print("\nTest completed! Run with RENFE_DEBUG=1 to keep the database and screenshots.")
 
 
 if __name__ == "__main__":
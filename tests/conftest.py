@@ -0,0 +1,50 @@
+"""
+Shared fixtures for the test suite.
+"""
+
+from datetime import datetime
+
+import pytest
+
+from trenes_tool.models import Station, TrainRoute, PriceData, TrainType
+
+
+# The models are frozen, so one instance of each can be shared by all tests;
+# variants are derived with model_copy(update=...), which skips validation
+
+
+@pytest.fixture(scope="session")
+def madri_atocha():
+    """Madrid-Atocha station."""
+    return Station(code="MADRI", name="Madrid-Atocha", city="Madrid")
+
+
+@pytest.fixture(scope="session")
+def bcnsa():
+    """Barcelona-Sants station."""
+    return Station(code="BCNSA", name="Barcelona-Sants", city="Barcelona")
+
+
+@pytest.fixture(scope="session")
+def sample_route(madri_atocha, bcnsa):
+    """Madrid-Barcelona AVE route."""
+    return TrainRoute(
+        origin=madri_atocha,
+        destination=bcnsa,
+        departure_time=datetime(2024, 12, 25, 8, 0),
+        arrival_time=datetime(2024, 12, 25, 10, 30),
+        train_type=TrainType.AVE,
+        train_number="AVE2104",
+        duration_minutes=150
+    )
+
+
+@pytest.fixture(scope="session")
+def sample_price(sample_route):
+    """Turista price for the sample route."""
+    return PriceData(
+        route=sample_route,
+        price_cents=4550,
+        ticket_type="Turista",
+        availability=50
+    )
@@ -0,0 +1,125 @@
+"""
+Test cases for the JSON search API client.
+"""
+
+import asyncio
+from datetime import date, datetime
+
+import pytest
+
+from trenes_tool import api, scraper
+from trenes_tool.api import RenfeApiClient, RenfeApiError
+from trenes_tool.models import TrainType
+
+
+def make_train(train_number: str, **overrides) -> dict:
+    """Build one train entry of a search API response."""
+    train = {
+        "trainNumber": train_number,
+        "trainType": "AVE",
+        "departureTime": "2024-12-25T08:00:00",
+        "arrivalTime": "2024-12-25T10:30:00",
+        "origin": {"code": "MADRI", "name": "Madrid-Atocha", "city": "Madrid"},
+        "destination": {"code": "BCNSA", "name": "Barcelona-Sants", "city": "Barcelona"},
+    }
+    train.update(overrides)
+    return train
+
+
+def test_parse_routes():
+    """Test building routes from a search API response."""
+    data = {"trains": [make_train("AVE2104"), make_train("AVLO6102", trainType="AVLO")]}
+
+    routes = RenfeApiClient()._parse_routes(data)
+
+    assert [r.train_number for r in routes] == ["AVE2104", "AVLO6102"]
+    assert routes[1].train_type == TrainType.AVLO
+    assert routes[0].departure_time == datetime(2024, 12, 25, 8, 0)
+    assert routes[0].duration_minutes == 150
+    assert routes[0].destination.code == "BCNSA"
+
+
+def test_parse_routes_skips_malformed_entries():
+    """Test that malformed train entries are skipped."""
+    data = {"trains": [make_train("AVE2104"), make_train("X1", trainType="BUS"), {"trainNumber": "X2"}]}
+
+    routes = RenfeApiClient()._parse_routes(data)
+
+    assert [r.train_number for r in routes] == ["AVE2104"]
+
+
+def test_start_without_httpx(monkeypatch):
+    """Test that a missing httpx is reported as an API error."""
+    monkeypatch.setattr(api, "httpx", None)
+
+    with pytest.raises(RenfeApiError):
+        asyncio.run(RenfeApiClient().start())
+
+
+def test_captured_headers_override_defaults():
+    """Test that headers captured from the browser replace the default ones."""
+    client = RenfeApiClient(
+        search_url="https://example.com/api/search",
+        headers={"User-Agent": "Captured/1.0", "X-Csrf-Token": "abc"},
+        cookies={"session": "123"}
+    )
+
+    assert client.search_url == "https://example.com/api/search"
+    assert client.headers["user-agent"] == "Captured/1.0"
+    assert client.headers["x-csrf-token"] == "abc"
+    assert client.headers["accept"] == "application/json"
+    assert client.cookies == {"session": "123"}
+
+
+@pytest.mark.parametrize("data", [{}, {"trains": None}, [make_train("AVE2104")], "blocked"])
+def test_parse_routes_rejects_unexpected_payloads(data):
+    """Test that responses without a list of trains are API errors, not empty results."""
+    with pytest.raises(RenfeApiError):
+        RenfeApiClient()._parse_routes(data)
+
+
+def test_quick_search_uses_api_only_when_enabled(monkeypatch):
+    """Test that quick_search goes straight to the browser unless the API is enabled."""
+    calls = []
+
+    class FakeApiClient:
+        async def __aenter__(self):
+            calls.append("api")
+            raise RenfeApiError("unavailable")
+
+        async def __aexit__(self, *exc_info):
+            pass
+
+    class FakeScraper:
+        def __init__(self, headless):
+            pass
+
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc_info):
+            pass
+
+        async def search_routes(self, origin, destination, departure_date):
+            calls.append("browser")
+            return []
+
+        @classmethod
+        async def shutdown_if_idle(cls):
+            calls.append("shutdown")
+
+    monkeypatch.setattr(scraper, "RenfeApiClient", FakeApiClient)
+    monkeypatch.setattr(scraper, "RenfeScraper", FakeScraper)
+    monkeypatch.delenv(api.USE_API_ENV, raising=False)
+
+    asyncio.run(scraper.quick_search("MADRI", "BCNSA", date(2024, 12, 25)))
+    assert calls == ["browser", "shutdown"]
+
+    calls.clear()
+    asyncio.run(scraper.quick_search("MADRI", "BCNSA", date(2024, 12, 25), keep_browser=True))
+    assert calls == ["browser"]
+
+    calls.clear()
+    monkeypatch.setenv(api.USE_API_ENV, "1")
+    asyncio.run(scraper.quick_search("MADRI", "BCNSA", date(2024, 12, 25)))
+    assert calls == ["api", "browser", "shutdown"]
@@ -0,0 +1,51 @@
+"""
+Test cases for the route search cache.
+"""
+
+import os
+from datetime import date
+
+import pytest
+
+from trenes_tool import cache
+
+
+TRAVEL_DATE = date(2024, 12, 25)
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    """Point the route cache at a temporary directory."""
+    monkeypatch.setattr(cache, "ROUTE_CACHE_DIR", tmp_path)
+    return tmp_path
+
+
+def test_cache_round_trip(sample_route):
+    """Test that saved routes are loaded back unchanged."""
+    cache.save_cached_routes("Madrid", "Barcelona", TRAVEL_DATE, [sample_route, sample_route])
+
+    assert cache.load_cached_routes("Madrid", "Barcelona", TRAVEL_DATE) == [sample_route, sample_route]
+
+
+def test_cache_miss():
+    """Test that a search that was never cached returns None."""
+    assert cache.load_cached_routes("Madrid", "Sevilla", TRAVEL_DATE) is None
+
+
+def test_cache_expires(sample_route):
+    """Test that entries older than the TTL are ignored."""
+    cache.save_cached_routes("Madrid", "Barcelona", TRAVEL_DATE, [sample_route])
+    path = cache._route_cache_path("Madrid", "Barcelona", TRAVEL_DATE)
+    stale = path.stat().st_mtime - cache.ROUTE_CACHE_TTL - 1
+    os.utime(path, (stale, stale))
+
+    assert cache.load_cached_routes("Madrid", "Barcelona", TRAVEL_DATE) is None
+
+
+def test_cache_keys_do_not_collide(sample_route):
+    """Test that queries differing only in case or punctuation are cached separately."""
+    cache.save_cached_routes("Madrid Atocha", "Barcelona", TRAVEL_DATE, [sample_route])
+
+    for origin in ("Madrid-Atocha", "madrid atocha", "MADRID ATOCHA"):
+        assert cache.load_cached_routes(origin, "Barcelona", TRAVEL_DATE) is None
+    assert cache.load_cached_routes("Madrid Atocha", "Barcelona", TRAVEL_DATE) == [sample_route]
@@ -0,0 +1,58 @@
+"""
+Test cases for the command-line interface.
+"""
+
+from datetime import date, datetime
+
+import pytest
+from click.testing import CliRunner
+
+from trenes_tool.cli import _on_travel_date, optimize, prices
+from trenes_tool.models import PriceData
+
+
+@pytest.fixture
+def make_scraped_price(sample_price):
+    """Factory for the sample price as parsed from a results page, with clock-only times."""
+    def make(departure: str, arrival: str) -> PriceData:
+        route = sample_price.route.model_copy(update={
+            "departure_time": datetime.strptime(departure, "%H:%M"),
+            "arrival_time": datetime.strptime(arrival, "%H:%M")
+        })
+        return sample_price.model_copy(update={"route": route})
+
+    return make
+
+
+def test_on_travel_date_anchors_scraped_times(make_scraped_price):
+    """Test that scraped clock times are moved onto the travel date before storing."""
+    same_day = make_scraped_price("08:00", "10:30")
+    overnight = make_scraped_price("22:45", "01:15")
+
+    dated = _on_travel_date([same_day, same_day, overnight], date(2024, 12, 25))
+
+    assert dated[0].route.departure_time == datetime(2024, 12, 25, 8, 0)
+    assert dated[0].route.arrival_time == datetime(2024, 12, 25, 10, 30)
+    assert dated[1].route is dated[0].route
+    assert dated[2].route.arrival_time == datetime(2024, 12, 26, 1, 15)
+    assert dated[0].price == same_day.price
+
+
+def test_prices_does_not_persist_by_default():
+    """Test that the prices command only writes to the database when asked."""
+    persist = next(param for param in prices.params if param.name == "persist")
+
+    assert persist.default is False
+
+
+def test_optimize_does_not_create_database(tmp_path, monkeypatch):
+    """Test that optimize without stored history leaves the working directory untouched."""
+    monkeypatch.chdir(tmp_path)
+
+    result = CliRunner().invoke(
+        optimize, ["-o", "MADRI", "-d", "BCNSA", "--date", "2030-01-15", "-p", "45.50"]
+    )
+
+    assert result.exit_code == 0, result.output
+    assert "Recommendation" in result.output
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,266 @@
+"""
+Test cases for the price database.
+"""
+
+import logging
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+
+from trenes_tool.database import PRICE_SUMMARY_SQL, PriceDatabase
+from trenes_tool.models import PriceData
+
+
+@pytest.fixture
+def db(tmp_path):
+    """Price database backed by a temporary file."""
+    database = PriceDatabase(str(tmp_path / "prices.db"))
+    yield database
+    database.close()
+
+
+@pytest.fixture
+def make_price(sample_price):
+    """Factory for Madrid-Barcelona PriceData variants of the sample price."""
+    def make(price: str = "45.50", train_number: str = "AVE2104") -> PriceData:
+        update = {"price": Decimal(price)}
+        if train_number != sample_price.route.train_number:
+            update["route"] = sample_price.route.model_copy(update={"train_number": train_number})
+        return sample_price.model_copy(update=update)
+
+    return make
+
+
+def test_connection_is_reused(db):
+    """Test that the same connection is handed out across calls."""
+    with db.get_connection() as first, db.get_connection() as second:
+        assert first is second
+
+
+def test_close_releases_connection(db):
+    """Test that close() drops the cached connection."""
+    with db.get_connection() as first:
+        pass
+    db.close()
+    with db.get_connection() as second:
+        assert first is not second
+
+
+def test_connection_pragmas(db):
+    """Test that connections use WAL and enforce foreign keys."""
+    with db.get_connection() as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+
+
+def test_add_station_is_idempotent(db, madri_atocha):
+    """Test that adding the same station twice returns the same ID."""
+    assert db.add_station(madri_atocha) == db.add_station(madri_atocha)
+    assert db.get_database_stats()["stations"] == 1
+
+
+def test_add_route_is_idempotent(db, sample_route):
+    """Test that adding the same route twice returns the same ID."""
+    assert db.add_route(sample_route) == db.add_route(sample_route)
+    assert db.get_database_stats()["routes"] == 1
+
+
+def test_station_and_route_ids_are_cached(db, sample_route):
+    """Test that resolved IDs are served from the in-process cache."""
+    route_id = db.add_route(sample_route)
+
+    assert db._station_id_cache == {"MADRI": 1, "BCNSA": 2}
+    assert list(db._route_id_cache.values()) == [route_id]
+
+    db.cleanup_old_data()
+
+    assert db._station_id_cache == {}
+    assert db._route_id_cache == {}
+
+
+def test_add_price_data(db, make_price):
+    """Test storing price data and reading back database counts."""
+    db.add_price_data(make_price("45.50"))
+    db.add_price_data(make_price("39.90"))
+
+    stats = db.get_database_stats()
+
+    assert stats["stations"] == 2
+    assert stats["routes"] == 1
+    assert stats["prices"] == 2
+
+
+def test_add_price_data_logs_one_summary_per_batch(db, make_price, caplog):
+    """Test that single rows log at DEBUG and batches log one INFO summary."""
+    with caplog.at_level(logging.DEBUG, logger="trenes_tool.database"):
+        db.add_price_data(make_price("45.50"))
+        db.add_price_data_bulk([make_price("39.90"), make_price("52.00", train_number="AVE2110")])
+
+    info = [record.getMessage() for record in caplog.records if record.levelno == logging.INFO]
+
+    assert info == ["Added 2 price records across 2 routes"]
+    assert any("Added price record 1" in record.getMessage() for record in caplog.records)
+
+
+def test_add_price_data_bulk(db, make_price):
+    """Test storing many prices in one call."""
+    items = [
+        make_price("45.50"),
+        make_price("39.90"),
+        make_price("52.00", train_number="AVE2110"),
+    ]
+
+    price_ids = db.add_price_data_bulk(items)
+    stats = db.get_database_stats()
+
+    assert len(price_ids) == 3
+    assert len(set(price_ids)) == 3
+    assert stats["stations"] == 2
+    assert stats["routes"] == 2
+    assert stats["prices"] == 3
+
+
+def test_add_price_data_bulk_empty(db):
+    """Test that an empty batch is a no-op."""
+    assert db.add_price_data_bulk([]) == []
+
+
+def test_add_price_data_bulk_from_generator(db, make_price):
+    """Test that any iterable of prices can be stored."""
+    price_ids = db.add_price_data_bulk(make_price(price) for price in ("45.50", "39.90"))
+
+    assert len(price_ids) == 2
+    assert db.get_database_stats()["prices"] == 2
+
+
+def test_get_price_history(db, make_price, sample_route):
+    """Test retrieving recently scraped prices for a route."""
+    db.add_price_data(make_price("45.50"))
+
+    history = db.get_price_history_list("MADRI", "BCNSA", sample_route.departure_time.date())
+
+    assert len(history) == 1
+    assert history[0]["price"] == 45.5
+    assert history[0]["train_number"] == "AVE2104"
+    assert history[0]["departure_time"] == datetime(2024, 12, 25, 8, 0)
+    assert history[0]["travel_date"] == date(2024, 12, 25)
+
+
+def test_get_route_statistics(db, make_price, sample_route):
+    """Test price statistics computed by SQLite."""
+    db.add_price_data_bulk([make_price(p) for p in ("40.00", "50.00", "60.00", "70.00")])
+
+    stats = db.get_route_statistics("MADRI", "BCNSA", sample_route.departure_time.date())
+
+    assert stats["data_points"] == 4
+    assert stats["min_price"] == 40.0
+    assert stats["max_price"] == 70.0
+    assert stats["price_range"] == 30.0
+    assert stats["variance"] == pytest.approx(125.0)
+    assert stats["price_volatility"] == pytest.approx(125.0 ** 0.5)
+    assert stats["p25_price"] == 50.0
+    assert stats["p75_price"] == 70.0
+
+
+def test_get_route_statistics_no_data(db, sample_route):
+    """Test that a route without prices has no statistics."""
+    assert db.get_route_statistics("MADRI", "BCNSA", sample_route.departure_time.date()) is None
+
+
+def test_in_memory_database(make_price):
+    """Test that ":memory:" gives a working throwaway database."""
+    with PriceDatabase(":memory:") as memory_db:
+        memory_db.add_price_data(make_price())
+
+        assert memory_db.get_database_stats()["prices"] == 1
+        assert len(memory_db.get_price_history_list("MADRI", "BCNSA", date(2024, 12, 25))) == 1
+
+
+def test_get_price_summary(db, make_price):
+    """Test the recent price summary aggregated by SQLite."""
+    db.add_price_data_bulk([make_price(p) for p in ("40.00", "50.00", "60.00")])
+
+    summary = db.get_price_summary("MADRI", "BCNSA", date(2024, 12, 25))
+
+    assert summary.data_points == 3
+    assert summary.min_price == 40.0
+    assert summary.avg_price == pytest.approx(50.0)
+    assert summary.max_price == 60.0
+    assert summary.last_seen == max(row["scraped_at"] for row in db.get_price_history("MADRI", "BCNSA", date(2024, 12, 25)))
+    assert db.get_price_summary("MADRI", "BCNSA", date(2024, 12, 26)) is None
+
+
+def test_price_lookups_use_route_index(db, make_price):
+    """Test that route price lookups search the composite route/date index."""
+    db.add_price_data_bulk([make_price(p) for p in ("40.00", "50.00")])
+    db.maintenance()
+
+    with db.get_connection() as conn:
+        plan = " ".join(
+            row["detail"] for row in conn.execute(
+                "EXPLAIN QUERY PLAN " + PRICE_SUMMARY_SQL,
+                ("MADRI", "BCNSA", date(2024, 12, 25), "-30 days")
+            )
+        )
+
+    assert "idx_prices_route_date_scraped" in plan
+
+
+def test_prices_stored_as_cents(db, make_price):
+    """Test that prices are stored as exact integer cents."""
+    db.add_price_data(make_price("19.99"))
+
+    with db.get_connection() as conn:
+        assert conn.execute("SELECT price_cents FROM prices").fetchone()[0] == 1999
+
+    assert db.get_price_history_list("MADRI", "BCNSA", date(2024, 12, 25))[0]["price"] == 19.99
+
+
+def test_euro_prices_are_migrated(tmp_path):
+    """Test that a database with euro-valued prices is converted to cents."""
+    path = tmp_path / "legacy.db"
+    with sqlite3.connect(path) as conn:
+        conn.execute("""
+            CREATE TABLE prices (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                route_id INTEGER NOT NULL,
+                price DECIMAL(10,2) NOT NULL,
+                currency TEXT DEFAULT 'EUR',
+                ticket_type TEXT NOT NULL,
+                availability INTEGER NOT NULL,
+                scraped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                travel_date DATE NOT NULL
+            )
+        """)
+        conn.execute(
+            "INSERT INTO prices (route_id, price, ticket_type, availability, travel_date) "
+            "VALUES (1, 45.5, 'Turista', 50, '2024-12-25')"
+        )
+    conn.close()
+
+    with PriceDatabase(str(path)) as legacy_db:
+        with legacy_db.get_connection() as conn:
+            assert conn.execute("SELECT price_cents FROM prices").fetchone()[0] == 4550
+
+
+def test_in_memory_database_is_shared_across_threads(make_price):
+    """Test that other threads see the same in-memory database."""
+    with PriceDatabase(":memory:") as memory_db:
+        memory_db.add_price_data(make_price())
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            stats = executor.submit(memory_db.get_database_stats).result()
+
+        assert stats["prices"] == 1
+
+
+def test_close_clears_id_caches(db, sample_route):
+    """Test that cached station and route IDs do not outlive the connections."""
+    db.add_route(sample_route)
+    db.close()
+
+    assert db._station_id_cache == {}
+    assert db._route_id_cache == {}
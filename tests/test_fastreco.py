@@ -0,0 +1,31 @@
+"""
+Test cases for the compiled numeric kernels.
+"""
+
+import math
+
+import numpy as np
+import pytest
+
+from trenes_tool._fastreco import price_stats
+
+
+def test_price_stats():
+    """Test the one-pass mean, minimum and maximum."""
+    prices = np.array([45.5, 39.9, 52.0, 48.25])
+
+    average, lowest, highest = price_stats(prices)
+
+    assert average == pytest.approx(prices.mean())
+    assert lowest == 39.9
+    assert highest == 52.0
+
+
+def test_price_stats_empty():
+    """Test that an empty array has undefined statistics."""
+    assert all(math.isnan(value) for value in price_stats(np.empty(0)))
+
+
+def test_price_stats_cents():
+    """Test summarizing integer cents from a PriceBatch."""
+    assert price_stats(np.array([4550, 5820, 7990], dtype=np.int64)) == pytest.approx((6120.0, 4550.0, 7990.0))
@@ -2,15 +2,20 @@
 Test cases for data models.
 """
 
+import statistics
 from datetime import datetime
 from decimal import Decimal
 
+import numpy as np
 import pytest
+from pydantic import ValidationError
 
 from trenes_tool.models import (
     Station,
     TrainRoute,
     PriceData,
+    PriceBatch,
+    PriceHistory,
     TrainType,
     OptimizationRecommendation,
     OptimizationResult
@@ -30,17 +35,14 @@ def test_station_creation():
     assert station.city == "Madrid"
 
 
-def test_train_route_creation():
+def test_train_route_creation(madri_atocha, bcnsa):
     """Test TrainRoute model creation."""
-    origin = Station(code="MADRI", name="Madrid-Atocha", city="Madrid")
-    destination = Station(code="BCNSA", name="Barcelona-Sants", city="Barcelona")
-
     departure = datetime(2024, 12, 25, 8, 0)
     arrival = datetime(2024, 12, 25, 10, 30)
 
     route = TrainRoute(
-        origin=origin,
-        destination=destination,
+        origin=madri_atocha,
+        destination=bcnsa,
         departure_time=departure,
         arrival_time=arrival,
         train_type=TrainType.AVE,
@@ -54,32 +56,29 @@ def test_train_route_creation():
     assert route.duration_minutes == 150
 
 
-def test_price_data_creation():
+def test_price_data_creation(sample_price):
     """Test PriceData model creation."""
-    origin = Station(code="MADRI", name="Madrid-Atocha", city="Madrid")
-    destination = Station(code="BCNSA", name="Barcelona-Sants", city="Barcelona")
+    price_data = sample_price
+
+    assert price_data.price == Decimal("45.50")
+    assert price_data.currency == "EUR"
+    assert price_data.ticket_type == "Turista"
+    assert price_data.availability == 50
 
-    route = TrainRoute(
-        origin=origin,
-        destination=destination,
-        departure_time=datetime(2024, 12, 25, 8, 0),
-        arrival_time=datetime(2024, 12, 25, 10, 30),
-        train_type=TrainType.AVE,
-        train_number="AVE2104",
-        duration_minutes=150
-    )
 
-    price_data = PriceData(
-        route=route,
+def test_price_data_cents(sample_route, sample_price):
+    """Test converting between Decimal prices and integer cents."""
+    assert sample_price.price_cents == 4550
+    assert sample_price == PriceData(
+        route=sample_route,
         price=Decimal("45.50"),
         ticket_type="Turista",
-        availability=50
+        availability=50,
+        scraped_at=sample_price.scraped_at
     )
 
-    assert price_data.price == Decimal("45.50")
-    assert price_data.currency == "EUR"
-    assert price_data.ticket_type == "Turista"
-    assert price_data.availability == 50
+    rounded = sample_price.model_copy(update={"price": Decimal("19.995")})
+    assert rounded.price_cents == 2000
 
 
 def test_optimization_result_creation():
@@ -98,6 +97,9 @@ def test_optimization_result_creation():
     assert result.confidence == 0.85
     assert result.days_until_departure == 7
 
+    with pytest.raises(ValidationError):
+        result.confidence = 0.1
+
 
 def test_train_type_enum():
     """Test TrainType enum values."""
@@ -111,4 +113,100 @@ def test_optimization_recommendation_enum():
     assert OptimizationRecommendation.BUY_NOW == "BUY_NOW"
     assert OptimizationRecommendation.WAIT == "WAIT"
     assert OptimizationRecommendation.PRICE_ALERT == "PRICE_ALERT"
-    assert OptimizationRecommendation.NO_DATA == "NO_DATA"
\ No newline at end of file
+    assert OptimizationRecommendation.NO_DATA == "NO_DATA"
+
+
+def test_price_history_statistics(sample_price):
+    """Test PriceHistory running statistics."""
+    history = PriceHistory(route_key="MADRI_BCNSA_2024-12-25_AVE")
+    for price in ("45.50", "39.90", "52.00"):
+        history.add_price(sample_price.model_copy(update={"price": Decimal(price)}))
+
+    assert history.lowest_price == 39.9
+    assert history.highest_price == 52.0
+    assert history.average_price == pytest.approx(45.8)
+
+
+def test_station_is_frozen(madri_atocha):
+    """Test that Station instances are immutable and hashable."""
+    with pytest.raises(ValidationError):
+        madri_atocha.code = "BCNSA"
+
+    assert hash(madri_atocha) == hash(Station(code="MADRI", name="Madrid-Atocha", city="Madrid"))
+
+
+def test_price_data_json_round_trip(sample_price):
+    """Test that PriceData survives JSON serialization without losing precision."""
+    restored = PriceData.model_validate_json(sample_price.model_dump_json())
+
+    assert restored == sample_price
+    assert restored.price == Decimal("45.50")
+
+
+def test_price_history_running_volatility(sample_price):
+    """Test that running variance and the recent window match a full recompute."""
+    values = [40.0, 42.5, 39.0, 45.0, 50.0, 47.5, 44.0, 41.0, 38.5]
+    history = PriceHistory(route_key="MADRI_BCNSA_2024-12-25_AVE")
+    for value in values:
+        history.add_price(sample_price.model_copy(update={"price": Decimal(str(value))}))
+
+    assert history.price_volatility == pytest.approx(statistics.stdev(values))
+    assert history.recent_prices == values[-7:]
+    assert history.recent_average == pytest.approx(statistics.mean(values[-7:]))
+
+    rebuilt = PriceHistory(route_key=history.route_key, prices=history.prices)
+    assert rebuilt.price_volatility == pytest.approx(history.price_volatility)
+
+
+def test_price_history_columns_grow(sample_price):
+    """Test that the columnar arrays track every added price past the initial capacity."""
+    history = PriceHistory(route_key="MADRI_BCNSA_2024-12-25_AVE")
+    for i in range(40):
+        history.add_price(sample_price.model_copy(update={
+            "price": Decimal(30 + i),
+            "availability": i,
+            "scraped_at": datetime(2024, 12, 1, 12, i)
+        }))
+
+    assert history.price_array.tolist() == [float(30 + i) for i in range(40)]
+    assert history.availability_array.tolist() == list(range(40))
+    assert history.time_array[1] - history.time_array[0] == 60 * 10**9
+    assert not history.price_array.flags.writeable
+
+    rebuilt = PriceHistory(route_key=history.route_key, prices=history.prices)
+    assert (rebuilt.time_array == history.time_array).all()
+
+
+def test_price_history_prices_since(sample_price):
+    """Test time-windowed price lookups for ordered and unordered histories."""
+    prices = [
+        sample_price.model_copy(update={
+            "price": Decimal(40 + day),
+            "scraped_at": datetime(2024, 12, day, 12, 0)
+        })
+        for day in range(1, 11)
+    ]
+
+    history = PriceHistory(route_key="MADRI_BCNSA_2024-12-25_AVE", prices=prices)
+    assert history.prices_since(datetime(2024, 12, 8, 12, 0)).tolist() == [48.0, 49.0, 50.0]
+    assert history.prices_since(datetime(2025, 1, 1)).tolist() == []
+
+    shuffled = PriceHistory(route_key=history.route_key, prices=prices[5:] + prices[:5])
+    assert sorted(shuffled.prices_since(datetime(2024, 12, 8, 12, 0)).tolist()) == [48.0, 49.0, 50.0]
+
+
+def test_price_batch_from_prices(sample_price):
+    """Test transposing price data into columnar arrays."""
+    prices = [sample_price, sample_price.model_copy(update={"price": Decimal("58.20"), "ticket_type": "Preferente"})]
+
+    batch = PriceBatch.from_prices(prices)
+
+    assert len(batch) == 2
+    assert batch.prices_cents.tolist() == [4550, 5820]
+    assert batch.prices_cents.dtype == np.int64
+    assert batch.ticket_types.tolist() == ["Turista", "Preferente"]
+    assert batch.train_numbers.tolist() == ["AVE2104", "AVE2104"]
+    assert batch.departures[0] == np.datetime64("2024-12-25T08:00")
+    assert batch.arrivals[0] == np.datetime64("2024-12-25T10:30")
+
+    assert len(PriceBatch.from_prices([])) == 0
@@ -0,0 +1,221 @@
+"""
+Test cases for the price optimizer.
+"""
+
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Optional
+
+import pytest
+
+from trenes_tool.database import PriceDatabase
+from trenes_tool.models import TrainRoute, PriceData, OptimizationRecommendation
+from trenes_tool import optimizer as optimizer_module
+from trenes_tool.optimizer import PriceOptimizer
+
+
+@pytest.fixture
+def make_route(sample_route):
+    """Factory moving the sample route to depart days_ahead from today."""
+    def make(days_ahead: int = 20) -> TrainRoute:
+        travel_date = date.today() + timedelta(days=days_ahead)
+        return sample_route.model_copy(update={
+            "departure_time": datetime.combine(travel_date, sample_route.departure_time.time()),
+            "arrival_time": datetime.combine(travel_date, sample_route.arrival_time.time())
+        })
+
+    return make
+
+
+@pytest.fixture
+def make_price(sample_price):
+    """Factory for sample price variants on route, scraped now unless given."""
+    def make(route: TrainRoute, price: str, scraped_at: Optional[datetime] = None) -> PriceData:
+        return sample_price.model_copy(update={
+            "route": route,
+            "price": Decimal(price),
+            "scraped_at": scraped_at or datetime.now()
+        })
+
+    return make
+
+
+@pytest.fixture
+def make_optimizer(make_price):
+    """Factory for an optimizer with a price history for route."""
+    def make(route: TrainRoute, prices) -> PriceOptimizer:
+        optimizer = PriceOptimizer()
+        for price in prices:
+            optimizer.add_price_data(make_price(route, price))
+        return optimizer
+
+    return make
+
+
+def test_no_data_recommendation(make_route):
+    """Test the heuristic used when there is not enough history."""
+    route = make_route(days_ahead=5)
+    result = PriceOptimizer().get_optimization_recommendation(route, Decimal("45.50"))
+
+    assert result.recommendation == OptimizationRecommendation.BUY_NOW
+    assert result.days_until_departure == 5
+
+
+def test_recommendation_near_historical_low(make_route, make_optimizer):
+    """Test that a price near the historical low is a buy signal."""
+    route = make_route()
+    optimizer = make_optimizer(route, ["50.00", "55.00", "60.00", "58.00"])
+
+    result = optimizer.get_optimization_recommendation(route, 51.0)
+
+    assert result.recommendation == OptimizationRecommendation.BUY_NOW
+    assert result.historical_low == Decimal("50")
+    assert result.historical_high == Decimal("60")
+    assert result.price_trend == "rising"
+
+
+def test_recommendation_keeps_decimal_price(make_route, make_optimizer):
+    """Test that a Decimal price is reported without a float round-trip."""
+    route = make_route()
+    optimizer = make_optimizer(route, ["50.00", "55.00", "60.00"])
+    price = Decimal("0.1") + Decimal("0.2")
+
+    assert optimizer.get_optimization_recommendation(route, price).current_price == Decimal("0.3")
+    assert PriceOptimizer().get_optimization_recommendation(route, price).current_price == Decimal("0.3")
+
+
+def test_recommendation_is_cached_until_history_changes(make_route, make_price, make_optimizer):
+    """Test that repeated queries reuse the result until new prices arrive."""
+    route = make_route()
+    optimizer = make_optimizer(route, ["50.00", "55.00", "60.00"])
+
+    first = optimizer.get_optimization_recommendation(route, 51.0)
+
+    assert optimizer.get_optimization_recommendation(route, 51.0) is first
+
+    optimizer.add_price_data(make_price(route, "45.00"))
+
+    assert optimizer.get_optimization_recommendation(route, 51.0) is not first
+
+
+def test_recommendation_cache_is_bounded(monkeypatch, make_route, make_optimizer):
+    """Test that the result cache evicts the least recently used entries."""
+    monkeypatch.setattr(optimizer_module, "RECOMMENDATION_CACHE_SIZE", 3)
+    route = make_route()
+    optimizer = make_optimizer(route, ["50.00", "55.00", "60.00"])
+
+    first = optimizer.get_optimization_recommendation(route, 51.0)
+    for price in (52.0, 53.0, 54.0):
+        optimizer.get_optimization_recommendation(route, price)
+
+    assert len(optimizer._recommendation_cache) == 3
+    assert optimizer.get_optimization_recommendation(route, 51.0) is not first
+
+
+def test_price_statistics(make_route, make_optimizer):
+    """Test summary statistics for a tracked route."""
+    route = make_route()
+    optimizer = make_optimizer(route, ["40.00", "50.00", "60.00"])
+    route_key = next(iter(optimizer.price_histories))
+
+    stats = optimizer.get_price_statistics(route_key)
+
+    assert stats["total_data_points"] == 3
+    assert stats["lowest_price"] == 40.0
+    assert stats["highest_price"] == 60.0
+    assert stats["average_price"] == pytest.approx(50.0)
+    assert stats["price_volatility"] == pytest.approx(10.0)
+
+
+def test_recommend_by_codes(make_route, make_price):
+    """Test recommendations computed from stored route statistics."""
+    route = make_route()
+    with PriceDatabase(":memory:") as db:
+        db.add_price_data_bulk([
+            make_price(route, price) for price in ["50.00", "55.00", "60.00", "58.00"]
+        ])
+        optimizer = PriceOptimizer(database=db)
+
+        result = optimizer.recommend_by_codes("MADRI", "BCNSA", route.departure_time.date(), 51.0)
+
+    assert result.recommendation == OptimizationRecommendation.BUY_NOW
+    assert result.historical_low == Decimal("50")
+    assert result.days_until_departure == 20
+
+
+def test_route_statistics_match_in_memory_analysis(make_route, make_price, make_optimizer):
+    """Test that the database path sees the same recent window and volatility as PriceHistory."""
+    route = make_route()
+    values = ["60.00", "62.00", "40.00", "45.00", "50.00", "48.00", "52.00", "55.00", "58.00", "61.00"]
+    prices = [
+        make_price(route, value, scraped_at=datetime(2024, 12, 1) + timedelta(hours=i))
+        for i, value in enumerate(values)
+    ]
+    optimizer = make_optimizer(route, [])
+    for price_data in prices:
+        optimizer.add_price_data(price_data)
+    history = next(iter(optimizer.price_histories.values()))
+
+    with PriceDatabase(":memory:") as db:
+        db.add_price_data_bulk(prices)
+        stats = db.get_route_statistics("MADRI", "BCNSA", route.departure_time.date())
+
+    from_history = optimizer._analyze_price_trends(history, 51.0)
+    from_database = optimizer._analyze_route_statistics(stats, 51.0)
+
+    assert from_database.keys() == from_history.keys()
+    for key, value in from_history.items():
+        assert from_database[key] == pytest.approx(value), key
+
+
+def test_recommend_by_codes_without_database(make_route):
+    """Test that recommend_by_codes falls back to the no-data heuristic."""
+    travel_date = make_route(days_ahead=40).departure_time.date()
+
+    result = PriceOptimizer().recommend_by_codes("MADRI", "BCNSA", travel_date, 45.5)
+
+    assert result.recommendation == OptimizationRecommendation.WAIT
+    assert result.route_key == f"MADRI_BCNSA_{travel_date}"
+
+
+def test_batch_recommend_matches_single_recommendations(make_route, make_price):
+    """Test that the batch kernel agrees with get_optimization_recommendation."""
+    histories = {
+        2: ["50.00", "52.00", "51.00"],
+        5: ["40.00", "45.00", "50.00", "60.00"],
+        10: ["80.00", "70.00", "60.00", "55.00"],
+        20: ["50.00", "55.00", "60.00", "58.00"],
+        40: ["45.00"],
+    }
+    optimizer = PriceOptimizer()
+    for days_ahead, values in histories.items():
+        for value in values:
+            optimizer.add_price_data(make_price(make_route(days_ahead), value))
+
+    routes = []
+    prices = []
+    for days_ahead in histories:
+        for price in ("30.00", "50.50", "56.00", "75.00"):
+            routes.append(make_route(days_ahead))
+            prices.append(Decimal(price))
+
+    batch = optimizer.batch_recommend(routes, prices)
+
+    assert len(batch) == len(routes)
+    for route, price, (recommendation, confidence) in zip(routes, prices, batch):
+        expected = optimizer.get_optimization_recommendation(route, price)
+        assert recommendation == expected.recommendation
+        assert confidence == pytest.approx(expected.confidence)
+
+
+def test_recommendation_signal_precedence():
+    """Test the precedence encoded in the recommendation transition table."""
+    from trenes_tool.optimizer import _Signal
+
+    apply_signals = PriceOptimizer._apply_signals
+
+    assert apply_signals([]) == OptimizationRecommendation.WAIT
+    assert apply_signals([_Signal.DEPARTURE_IMMINENT]) == OptimizationRecommendation.BUY_NOW
+    assert apply_signals([_Signal.EXCELLENT_PRICE, _Signal.FALLING_TREND]) == OptimizationRecommendation.BUY_NOW
+    assert apply_signals([_Signal.HIGH_PRICE_EARLY, _Signal.RISING_TREND]) == OptimizationRecommendation.BUY_NOW
+    assert apply_signals([_Signal.EXCELLENT_PRICE, _Signal.PRICE_ALERT]) == OptimizationRecommendation.PRICE_ALERT
@@ -0,0 +1,373 @@
+"""
+Test cases for the Renfe scraper.
+"""
+
+import asyncio
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+
+from trenes_tool.scraper import RenfeScraper, _parse_clock_time
+
+
+SEARCH_HTML = """
+<html><body>
+  <header>Renfe</header>
+  <div data-testid="train-result" data-train-number="AVE2104">
+    <span class="departure-time">08:00</span>
+    <span class="arrival-time">10:30</span>
+  </div>
+  <div data-testid="train-result" data-train-number="AVE2110">
+    <span class="departure-time">11:00</span>
+    <span class="arrival-time">13:30</span>
+  </div>
+</body></html>
+"""
+
+PRICE_HTML = """
+<html><body>
+  <div class="price-option" data-availability="12">
+    <span class="ticket-type">Turista</span>
+    <span class="price">45,50 €</span>
+  </div>
+  <div class="price-option selected" data-availability="3">
+    <span class="ticket-type">Preferente</span>
+    <span class="price">78,20 €</span>
+  </div>
+</body></html>
+"""
+
+
+def test_parse_search_html():
+    """Test extracting routes from search results markup."""
+    routes = RenfeScraper()._parse_search_html(SEARCH_HTML)
+
+    assert [r.train_number for r in routes] == ["AVE2104", "AVE2110"]
+    assert routes[0].departure_time.strftime("%H:%M") == "08:00"
+    assert routes[1].arrival_time.strftime("%H:%M") == "13:30"
+    assert RenfeScraper()._parse_search_html("") == []
+
+
+def test_parse_price_html(sample_route):
+    """Test extracting price options for a route."""
+    prices = RenfeScraper()._parse_price_html(PRICE_HTML, sample_route)
+
+    assert [p.ticket_type for p in prices] == ["Turista", "Preferente"]
+    assert prices[0].price == Decimal("45.5")
+    assert prices[1].availability == 3
+
+
+class FakePage:
+    """Stand-in for a Playwright page."""
+
+    def __init__(self):
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+
+
+def test_search_many_runs_queries_concurrently(monkeypatch):
+    """Test that search_many bounds concurrency and keeps query order."""
+    scraper = RenfeScraper()
+    scraper.context = object()
+    pages = []
+    running = 0
+    peak = 0
+
+    async def new_page():
+        pages.append(FakePage())
+        return pages[-1]
+
+    async def search_routes(origin, destination, departure_date, page=None):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        if origin == "FAIL":
+            raise RuntimeError("search failed")
+        return [origin]
+
+    monkeypatch.setattr(scraper, "_new_page", new_page)
+    monkeypatch.setattr(scraper, "search_routes", search_routes)
+
+    queries = [(code, "MADRI", date(2024, 12, 25)) for code in ("A", "B", "FAIL", "C", "D")]
+    results = asyncio.run(scraper.search_many(queries, concurrency=2))
+
+    assert results == [["A"], ["B"], [], ["C"], ["D"]]
+    assert peak == 2
+    assert len(pages) == 5 and all(p.closed for p in pages)
+
+
+def test_get_price_details_many_replays_search_on_extra_pages(monkeypatch):
+    """Test that extra pages rerun the last search before clicking through routes."""
+    scraper = RenfeScraper()
+    scraper.page = FakePage()
+    scraper._last_search = ("MADRI", "BCNSA", date(2024, 12, 25), None)
+    pages = []
+    searched = []
+    clicked = []
+
+    async def new_page():
+        pages.append(FakePage())
+        return pages[-1]
+
+    async def search_routes(origin, destination, departure_date, return_date=None, page=None):
+        searched.append(page)
+        if len(searched) == 2:
+            raise RuntimeError("search failed")
+        return []
+
+    async def get_price_details(route, ticket_types=None, page=None):
+        clicked.append((route, page))
+        await asyncio.sleep(0.01)
+        return [route]
+
+    monkeypatch.setattr(scraper, "_new_page", new_page)
+    monkeypatch.setattr(scraper, "search_routes", search_routes)
+    monkeypatch.setattr(scraper, "get_price_details", get_price_details)
+
+    routes = ["R1", "R2", "R3", "R4", "R5"]
+    results = asyncio.run(scraper.get_price_details_many(routes, max_concurrency=3))
+
+    assert results == routes
+    assert searched == pages and len(pages) == 2
+    assert {page for _, page in clicked} == {scraper.page, pages[0]}
+    assert all(page.closed for page in pages)
+
+    # Two routes are not worth replaying the search for
+    clicked.clear()
+    assert asyncio.run(scraper.get_price_details_many(routes[:2])) == routes[:2]
+    assert {page for _, page in clicked} == {scraper.page}
+    assert len(pages) == 2
+
+    # Without a recorded search, everything is clicked through on the main page
+    scraper._last_search = None
+    clicked.clear()
+    assert asyncio.run(scraper.get_price_details_many(routes)) == routes
+    assert {page for _, page in clicked} == {scraper.page}
+
+
+def test_search_dates_keys_results_by_date(monkeypatch):
+    """Test that search_dates fans dates out through search_many."""
+    scraper = RenfeScraper()
+    calls = []
+
+    async def search_many(queries, concurrency):
+        calls.append((queries, concurrency))
+        return [[departure_date.day] for _, _, departure_date in queries]
+
+    monkeypatch.setattr(scraper, "search_many", search_many)
+
+    dates = [date(2024, 12, 26), date(2024, 12, 25), date(2024, 12, 26)]
+    results = asyncio.run(scraper.search_dates("MADRI", "BCNSA", dates, concurrency=3))
+
+    assert list(results.items()) == [(date(2024, 12, 26), [26]), (date(2024, 12, 25), [25])]
+    assert calls == [([
+        ("MADRI", "BCNSA", date(2024, 12, 26)),
+        ("MADRI", "BCNSA", date(2024, 12, 25)),
+    ], 3)]
+
+
+class FakeFormPage(FakePage):
+    """Page stand-in that records form interactions."""
+
+    def __init__(self, hits):
+        super().__init__()
+        self.hits = hits
+        self.evaluations = 0
+        self.fills = []
+
+    async def wait_for_load_state(self, state):
+        pass
+
+    async def evaluate(self, script, arg):
+        self.evaluations += 1
+        return {field: self.hits.get(field) for field in arg}
+
+    async def fill(self, selector, value):
+        self.fills.append((selector, value))
+
+
+def test_fill_search_form_detects_fields_in_one_call():
+    """Test that form fields are located with a single evaluate call."""
+    page = FakeFormPage({"origin": "#origen", "date": "input[type='date']"})
+
+    asyncio.run(RenfeScraper()._fill_search_form(page, "Madrid", "Barcelona", date(2024, 12, 25)))
+
+    assert page.evaluations == 1
+    assert page.fills == [("#origen", "Madrid"), ("input[type='date']", "25/12/2024")]
+
+
+class FakeContext:
+    """Stand-in for a Playwright browser context."""
+
+    def __init__(self):
+        self.saved_to = None
+        self.closed = False
+
+    async def new_page(self):
+        return FakePage()
+
+    async def storage_state(self, path):
+        self.saved_to = path
+
+    async def close(self):
+        self.closed = True
+
+
+def test_close_saves_storage_state(tmp_path):
+    """Test that closing a scraper persists its storage state."""
+    state = tmp_path / "browser" / "state.json"
+    scraper = RenfeScraper(storage_state=state)
+    context = scraper.context = FakeContext()
+
+    asyncio.run(scraper.close())
+
+    assert state.parent.is_dir()
+    assert context.saved_to == state
+    assert context.closed and scraper.context is None
+
+
+def test_capture_api_client_drops_unforwarded_headers(monkeypatch):
+    """Test that captured HTTP/2 pseudo-headers and client-managed headers are dropped."""
+    class FakeRequest:
+        resource_type = "fetch"
+        method = "POST"
+        url = "https://example.com/api/search"
+
+        async def all_headers(self):
+            return {
+                ":authority": "example.com",
+                ":method": "POST",
+                ":path": "/api/search",
+                ":scheme": "https",
+                "Content-Length": "42",
+                "cookie": "session=abc",
+                "x-csrf-token": "token",
+            }
+
+    class FakeResponse:
+        request = FakeRequest()
+        headers = {"content-type": "application/json"}
+
+    class FakeEventPage(FakePage):
+        def on(self, event, handler):
+            self.handler = handler
+
+        def remove_listener(self, event, handler):
+            self.handler = None
+
+    class FakeCookieContext(FakeContext):
+        async def cookies(self):
+            return [{"name": "session", "value": "abc"}]
+
+    scraper = RenfeScraper()
+    scraper.page = FakeEventPage()
+    scraper.context = FakeCookieContext()
+
+    async def search_routes(origin, destination, departure_date):
+        scraper.page.handler(FakeResponse())
+        return []
+
+    monkeypatch.setattr(scraper, "search_routes", search_routes)
+
+    client = asyncio.run(scraper.capture_api_client("MADRI", "BCNSA", date(2024, 12, 25)))
+
+    assert client.search_url == FakeRequest.url
+    assert client.cookies == {"session": "abc"}
+    assert not any(name.startswith(":") for name in client.headers)
+    assert "content-length" not in client.headers and "cookie" not in client.headers
+    assert client.headers["x-csrf-token"] == "token"
+
+def test_shutdown_if_idle_waits_for_open_scrapers(monkeypatch):
+    """Test that the shared browser outlives helpers while other scrapers use it."""
+    shutdowns = []
+
+    class FakeBrowser:
+        async def new_context(self, **kwargs):
+            return FakeContext()
+
+    async def get_browser(headless):
+        return FakeBrowser()
+
+    async def shutdown():
+        shutdowns.append(True)
+
+    monkeypatch.setattr(RenfeScraper, "_get_browser", staticmethod(get_browser))
+    monkeypatch.setattr(RenfeScraper, "shutdown", staticmethod(shutdown))
+
+    async def run():
+        first, second = RenfeScraper(), RenfeScraper()
+        await asyncio.gather(first.start(), second.start())
+
+        await first.close()
+        await RenfeScraper.shutdown_if_idle()
+        assert shutdowns == []
+
+        await second.close()
+        await second.close()
+        await RenfeScraper.shutdown_if_idle()
+        assert shutdowns == [True]
+
+    asyncio.run(run())
+
+
+class FakeLocator:
+    """Stand-in for a Playwright locator over static markup."""
+
+    def __init__(self, fragments):
+        self.fragments = fragments
+
+    async def evaluate_all(self, script):
+        return "".join(self.fragments)
+
+
+class FakeResultsPage(FakePage):
+    """Page stand-in serving markup for each selector."""
+
+    def __init__(self, fragments_by_selector):
+        super().__init__()
+        self.fragments_by_selector = fragments_by_selector
+
+    def locator(self, selector):
+        return FakeLocator(self.fragments_by_selector.get(selector, []))
+
+
+def test_parse_search_results_from_locator_fragments():
+    """Test that search results are parsed from the matched elements only."""
+    scraper = RenfeScraper()
+    page = FakeResultsPage({scraper.RESULT_SELECTOR: [
+        '<div data-testid="train-result" data-train-number="AVE2104">'
+        '<span class="departure-time">08:00</span><span class="arrival-time">10:30</span></div>'
+    ]})
+
+    routes = asyncio.run(scraper._parse_search_results(page))
+
+    assert [r.train_number for r in routes] == ["AVE2104"]
+    assert asyncio.run(scraper._parse_search_results(FakeResultsPage({}))) == []
+
+
+def test_parse_price_details_from_locator_fragments(sample_route):
+    """Test that price details are parsed from the matched elements only."""
+    scraper = RenfeScraper()
+    page = FakeResultsPage({scraper.PRICE_OPTION_SELECTOR: [
+        '<div class="price-option" data-availability="4">'
+        '<span class="ticket-type">Turista</span><span class="price">45,50 €</span></div>'
+    ]})
+
+    prices = asyncio.run(scraper._parse_price_details(sample_route, page))
+
+    assert [(p.ticket_type, p.price, p.availability) for p in prices] == [("Turista", Decimal("45.5"), 4)]
+
+
+def test_parse_clock_time_matches_strptime():
+    """Test that clock times parse exactly like strptime with "%H:%M"."""
+    for value in ("08:00", "8:5", "23:59"):
+        assert _parse_clock_time(value) == datetime.strptime(value, "%H:%M")
+
+    for value in ("24:00", "08:60", "0800", "08:00h", "", "001:00"):
+        with pytest.raises(ValueError):
+            _parse_clock_time(value)